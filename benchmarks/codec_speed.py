@@ -0,0 +1,62 @@
+"""Compare save/load time and file size of the JSON and binary snapshot codecs.
+
+Every run also checks that both codecs round-trip the data exactly.
+
+Usage: python benchmarks/codec_speed.py [--rows 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finance_core import BinaryCodec, JsonCodec, Transaction, TransactionType
+from memory_layout import generate_rows
+
+
+def edge_cases():
+    """Rows that exercise the less common encoding paths"""
+    unicode_row = Transaction(12.5, "Café ☕ – naïve", TransactionType.EXPENSE, "Custom 🍩 category")
+    long_id_row = Transaction(0.01, "Long id", TransactionType.INCOME, "Salary")
+    long_id_row.id = "imported-0123456789"
+    return [unicode_row, long_id_row]
+
+
+def round_trip(codec, transactions, path):
+    meta = {'currency_code': "EUR"}
+    start = time.perf_counter()
+    with open(path, 'wb' if codec.binary else 'w') as f:
+        codec.dump(f, transactions, meta)
+    saved = time.perf_counter()
+    with open(path, 'rb') as f:
+        loaded, loaded_meta = codec.load(f)
+    done = time.perf_counter()
+
+    assert loaded_meta == meta, f"{type(codec).__name__}: metadata changed"
+    assert [t.to_dict() for t in loaded] == [t.to_dict() for t in transactions], \
+        f"{type(codec).__name__}: transactions changed"
+    return saved - start, done - saved, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'codec':<7} {'save s':>8} {'load s':>8} {'size MiB':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            transactions = list(generate_rows(rows)) + edge_cases()
+            results = {}
+            for codec in (JsonCodec(), BinaryCodec()):
+                path = os.path.join(folder, f"snapshot{codec.extension}")
+                results[codec.extension] = save, load, size = round_trip(codec, transactions, path)
+                print(f"{rows:>10,}  {codec.extension[1:]:<7} {save:8.2f} {load:8.2f} {size / 2**20:9.1f}")
+            json_load, binary_load = results[JsonCodec.extension][1], results[BinaryCodec.extension][1]
+            print(f"{'':>10}  load speedup {json_load / binary_load:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the memory used by a list of Transaction objects and by TransactionColumns.
+
+Also opens the same history with FinanceData in journal mode, which keeps
+Transaction objects, and in mapped mode, which keeps it as columns.
+
+Usage: python benchmarks/memory_layout.py [--rows 1000000]
+"""
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finance_core import BinaryCodec, FinanceData, Transaction, TransactionColumns, TransactionType
+
+
+def generate_rows(count, seed=42):
+    """Yield transactions the way load_data builds them, one fresh object per row"""
+    rng = random.Random(seed)
+    income = [name for _, name in FinanceData.INCOME_CATEGORIES]
+    expense = [name for _, name in FinanceData.EXPENSE_CATEGORIES]
+    start = datetime(2015, 1, 1)
+    for i in range(count):
+        is_income = rng.random() < 0.2
+        date = start + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60))
+        yield Transaction.from_dict({
+            'id': f"{i:08x}",
+            'amount': round(rng.uniform(1, 500), 2),
+            'description': f"Payee {rng.randrange(2000)}",
+            'transaction_type': (TransactionType.INCOME if is_income else TransactionType.EXPENSE).value,
+            'category': rng.choice(income if is_income else expense),
+            'date': date.isoformat(),
+            'created_at': date.isoformat()
+        })
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    objects, object_bytes = measure(lambda: list(generate_rows(args.rows)))
+    del objects
+    columns, column_bytes = measure(lambda: TransactionColumns.from_transactions(generate_rows(args.rows)))
+
+    print(f"rows:               {args.rows:,}")
+    print(f"list of objects:    {object_bytes / 2**20:10.1f} MiB  ({object_bytes / args.rows:6.1f} B/row)")
+    print(f"TransactionColumns: {column_bytes / 2**20:10.1f} MiB  ({column_bytes / args.rows:6.1f} B/row)")
+    print(f"reduction:          {object_bytes / column_bytes:10.1f}x")
+    del columns
+
+    # Live memory of FinanceData itself, over the same rows in a binary file
+    folder = tempfile.mkdtemp()
+    try:
+        for mode in ("journal", "mapped"):
+            path = os.path.join(folder, f"{mode}.fdb")
+            with open(path, 'wb') as f:
+                BinaryCodec().dump(f, generate_rows(args.rows))
+            # Mapped mode rewrites the file in its own layout the first time it is opened
+            FinanceData(path, storage_mode=mode, codec="binary").close()
+            data, used = measure(lambda: FinanceData(path, storage_mode=mode, codec="binary"))
+            # The mapping itself is file-backed page cache, which tracemalloc does not count
+            note = "  + the file mapping" if mode == "mapped" else ""
+            print(f"FinanceData {mode + ':':<8}{used / 2**20:10.1f} MiB  ({used / args.rows:6.1f} B/row){note}")
+            data.close()
+            del data
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compare app startup before and after lazy screens and partitioned loading.
+
+Data: time to open the history and answer the dashboard's first queries,
+reading one whole JSON file (as the app used to) or a binary partitioned
+history that preloads only the last 30 days (as it does now). Every run
+checks that both answer the same.
+
+Screens: time from the first import to the first drawn frame, building
+every screen at startup (as before) or only the dashboard (as now). Needs
+KivyMD and a display; it is skipped when KivyMD is not installed.
+
+Usage: python benchmarks/startup.py [--rows 10000 100000] [--repeat 5]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finance_core import FinanceData
+from memory_layout import generate_rows
+
+# How the app opens its data: before lazy loading, and now
+BEFORE = dict(storage_mode="json")
+AFTER = dict(storage_mode="journal", snapshot_format="partitioned", preload_days=30, codec="binary")
+
+
+def recent_rows(count):
+    """generate_rows moved forward so the newest row is from today, as in a live history"""
+    transactions = list(generate_rows(count))
+    shift = datetime.now() - max(t.date for t in transactions)
+    for t in transactions:
+        t.date += shift
+    return transactions
+
+
+def write_history(path, transactions, options):
+    data = FinanceData(path, **dict(options, preload_days=None))
+    data.add_transactions(transactions)
+    data.save_data()
+    data.close()
+
+
+def open_dashboard(path, options):
+    """Open the data and run the dashboard's queries; returns seconds and what was shown"""
+    start = time.perf_counter()
+    data = FinanceData(path, **options)
+    shown = (round(data.get_balance(), 2), round(data.get_period_stats(30)['expenses'], 2),
+             [t.id for t in data.get_recent_transactions(5)])
+    elapsed = time.perf_counter() - start
+    data.close()
+    return elapsed, shown
+
+
+def compare_data(rows, repeat, folder):
+    transactions = recent_rows(rows)
+    paths = {}
+    for name, options in (("before", BEFORE), ("after", AFTER)):
+        paths[name] = os.path.join(folder, f"{name}-{rows}.json")
+        write_history(paths[name], transactions, options)
+    times = {}
+    for name, options in (("before", BEFORE), ("after", AFTER)):
+        runs = [open_dashboard(paths[name], options) for _ in range(repeat)]
+        times[name] = statistics.median(elapsed for elapsed, _ in runs)
+        times[name + " shown"] = runs[0][1]
+    assert times["before shown"] == times["after shown"], "the dashboards differ"
+    return times["before"], times["after"]
+
+
+def run_app(eager):
+    """Child process: start the app, stop it on the first frame and print the startup time"""
+    import main
+    from kivy.clock import Clock
+
+    class BenchmarkApp(main.FinanceApp):
+        def build(self):
+            root = super().build()
+            if eager:
+                # As before lazy screens: every screen builds its widgets at startup
+                for screen in root.screens:
+                    if screen.name != root.current:
+                        screen.on_pre_enter()
+                self.startup.mark("other screens build")
+            return root
+
+        def on_start(self):
+            def first_frame(dt):
+                self.startup.mark("first frame")
+                self.startup.report()
+                print(f"startup_ms {(self.startup.last - self.startup.started) * 1000:.1f}")
+                self.stop()
+
+            Clock.schedule_once(first_frame)
+
+    BenchmarkApp().run()
+
+
+def compare_screens(rows, repeat, folder):
+    # The app reads finance_data.json from its working directory
+    app_folder = os.path.join(folder, f"app-{rows}")
+    os.makedirs(app_folder)
+    write_history(os.path.join(app_folder, "finance_data.json"), recent_rows(rows), AFTER)
+    times = {}
+    for mode in ("eager", "lazy"):
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--app", mode], cwd=app_folder,
+                                    capture_output=True, text=True, check=True).stdout
+            runs.append(float(next(line.split()[1] for line in output.splitlines()
+                                   if line.startswith("startup_ms"))))
+        times[mode] = statistics.median(runs) / 1000
+    return times["eager"], times["lazy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--app", choices=("eager", "lazy"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.app:
+        run_app(args.app == "eager")
+        return
+
+    has_kivymd = importlib.util.find_spec("kivymd") is not None
+    print(f"{'rows':>10}  {'phase':<8} {'before s':>9} {'after s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            before, after = compare_data(rows, args.repeat, folder)
+            print(f"{rows:>10,}  {'data':<8} {before:9.3f} {after:9.3f} {before / after:7.1f}x")
+            if has_kivymd:
+                before, after = compare_screens(rows, args.repeat, folder)
+                print(f"{rows:>10,}  {'screens':<8} {before:9.3f} {after:9.3f} {before / after:7.1f}x")
+    if not has_kivymd:
+        print("KivyMD is not installed, so screen building was not measured")
+
+
+if __name__ == "__main__":
+    main()
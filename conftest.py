@@ -0,0 +1,40 @@
+# Lets pytest import finance_core from the repository root without installing it
+"""Fixtures shared by the tests in tests/"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import FinanceData, TransactionType
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Data file in a fresh folder"""
+    return str(tmp_path / "data.json")
+
+
+@pytest.fixture
+def data(path):
+    """Empty journal-mode FinanceData; modules testing other backends override it"""
+    finance = FinanceData(path, storage_mode="journal")
+    yield finance
+    finance.close()
+
+
+@pytest.fixture
+def item():
+    """item(amount, description, **fields) builds one add_transactions dict, an expense by default"""
+    def make(amount=1, description="item", **fields):
+        return dict(dict(transaction_type=TransactionType.EXPENSE, category="Food & Dining"),
+                    amount=amount, description=description, **fields)
+    return make
+
+
+@pytest.fixture
+def sample(item):
+    """sample(count, start) builds count items a day apart, every fourth one income"""
+    def make(count=20, start=datetime(2024, 1, 1)):
+        return [item(i + 1, f"item {i}", date=start + timedelta(days=i),
+                     **(dict(transaction_type=TransactionType.INCOME, category="Salary") if i % 4 == 0 else {}))
+                for i in range(count)]
+    return make
@@ -0,0 +1,23 @@
+"""Headless finance core: transactions, storage, analytics, categories, search, FX, formatting and import
+
+Nothing in this package imports Kivy, so it can be used from scripts,
+batch jobs and servers. The app in main.py is layered on top of it.
+"""
+from .models import EXPENSE_CATEGORIES, INCOME_CATEGORIES, Currency, Transaction, TransactionType
+from .columns import BinaryCodec, JsonCodec, MappedColumns, MappedStrings, TransactionColumns
+from .analytics import ColumnarAnalytics, DailyAggregates, DailyTotals
+from .storage import BackgroundWriter, DataHandler, FinanceData, SqliteFinanceData, TransactionJournal
+from .importers import StatementImporter
+from .search import SearchIndex
+from .fx import ExchangeRates
+from .formatting import CurrencyFormat, DisplayFormatter
+from .categories import Category, CategoryRegistry
+from .events import ChangeEvent
+
+__all__ = [
+    "BackgroundWriter", "BinaryCodec", "Category", "CategoryRegistry", "ChangeEvent", "ColumnarAnalytics",
+    "Currency", "CurrencyFormat", "DailyAggregates", "DailyTotals", "DataHandler", "DisplayFormatter",
+    "EXPENSE_CATEGORIES", "ExchangeRates", "FinanceData", "INCOME_CATEGORIES", "JsonCodec", "MappedColumns",
+    "MappedStrings", "SearchIndex", "SqliteFinanceData", "StatementImporter", "Transaction",
+    "TransactionColumns", "TransactionJournal", "TransactionType",
+]
@@ -0,0 +1,289 @@
+"""Date range statistics: daily prefix sums and vectorised column scans"""
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+
+from .columns import MappedColumns, TransactionColumns
+from .models import Transaction, TransactionType
+
+# NumPy is imported on first use so importing the core stays fast; False once it failed
+np = None
+
+def _numpy():
+    """The numpy module, or None when it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # ColumnarAnalytics falls back to pure Python
+            np = False
+    return np or None
+
+def converted_amounts(columns: TransactionColumns, factor) -> Sequence[float]:
+    """columns.amounts with each row multiplied by factor(currency code, day)
+    
+    factor is called once per distinct currency and day rather than once per row.
+    """
+    first_day = TransactionColumns.EPOCH.date()
+    day_length = 86_400_000_000  # microseconds
+    numpy = _numpy()
+    if numpy is not None and len(columns):
+        days = np.asarray(columns.dates, dtype=np.int64) // day_length
+        offset = int(days.min())
+        keys = (np.asarray(columns.currency_codes, dtype=np.int64) << 32) | (days - offset)
+        unique, rows = np.unique(keys, return_inverse=True)
+        factors = np.array([factor(int(key) >> 32, first_day + timedelta(days=offset + (int(key) & 0xFFFFFFFF)))
+                            for key in unique], dtype=np.float64)
+        return np.asarray(columns.amounts, dtype=np.float64) * factors[rows]
+    memo = {}
+    amounts = array('d', columns.amounts)
+    for row, key in enumerate(zip(columns.currency_codes, (when // day_length for when in columns.dates))):
+        value = memo.get(key)
+        if value is None:
+            value = memo[key] = factor(key[0], first_day + timedelta(days=key[1]))
+        amounts[row] *= value
+    return amounts
+
+def range_bounds(start: Union[date, datetime, None],
+                 end: Union[date, datetime, None]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Turn an inclusive start/end into a half-open [lo, hi) datetime interval"""
+    lo = hi = None
+    if start is not None:
+        lo = start if isinstance(start, datetime) else datetime.combine(start, datetime.min.time())
+    if end is not None:
+        if isinstance(end, datetime):
+            hi = end + timedelta(microseconds=1)
+        else:
+            hi = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+    return lo, hi
+
+def empty_range_stats() -> Dict:
+    return {
+        'income': 0.0,
+        'expenses': 0.0,
+        'balance': 0.0,
+        'count': 0,
+        'income_count': 0,
+        'expense_count': 0,
+        'categories': {TransactionType.INCOME: {}, TransactionType.EXPENSE: {}}
+    }
+
+def accumulate_stats(stats: Dict, transaction_type: TransactionType, category: Optional[str],
+                     amount: float, count: int):
+    if not count:
+        return
+    if transaction_type == TransactionType.INCOME:
+        stats['income'] += amount
+        stats['income_count'] += count
+    else:
+        stats['expenses'] += amount
+        stats['expense_count'] += count
+    stats['count'] += count
+    if category is not None:
+        categories = stats['categories'][transaction_type]
+        categories[category] = categories.get(category, 0) + amount
+
+class DailyTotals:
+    """Per-day amount and count for one series, kept as prefix sums"""
+    
+    def __init__(self):
+        self.days: List[date] = []
+        self._day_amounts: List[float] = []
+        self._day_counts: List[int] = []
+        # _amounts[i] / _counts[i] hold the totals of days[:i]
+        self._amounts: List[float] = [0.0]
+        self._counts: List[int] = [0]
+    
+    @classmethod
+    def from_buckets(cls, buckets: Dict[date, List]) -> 'DailyTotals':
+        totals = cls()
+        totals.add_many(buckets)
+        return totals
+    
+    def _refresh_prefix(self, start: int):
+        """Recompute the prefix sums from days[start] onwards"""
+        self._amounts[start:] = accumulate(self._day_amounts[start:], initial=self._amounts[start])
+        self._counts[start:] = accumulate(self._day_counts[start:], initial=self._counts[start])
+    
+    def _merge(self, day: date, amount: float, count: int) -> int:
+        position = bisect_left(self.days, day)
+        if position == len(self.days) or self.days[position] != day:
+            self.days.insert(position, day)
+            self._day_amounts.insert(position, 0.0)
+            self._day_counts.insert(position, 0)
+        self._day_amounts[position] += amount
+        self._day_counts[position] += count
+        if not self._day_counts[position]:
+            # Bucket is empty again
+            del self.days[position]
+            del self._day_amounts[position]
+            del self._day_counts[position]
+        return position
+    
+    def add(self, day: date, amount: float, count: int = 1):
+        """Add to one day's bucket; cost is the number of later days"""
+        self._refresh_prefix(self._merge(day, amount, count))
+    
+    def add_many(self, buckets: Dict[date, List]):
+        """Merge several days, refreshing the prefix sums once from the earliest day touched"""
+        if not buckets:
+            return
+        start = min(self._merge(day, amount, count) for day, (amount, count) in buckets.items())
+        self._refresh_prefix(min(start, bisect_left(self.days, min(buckets))))
+    
+    def query(self, first_day: Optional[date], last_day: Optional[date]) -> Tuple[float, int]:
+        """Amount and count for first_day..last_day inclusive (None is open-ended)"""
+        start = 0 if first_day is None else bisect_left(self.days, first_day)
+        end = len(self.days) if last_day is None else bisect_right(self.days, last_day)
+        if end <= start:
+            return 0.0, 0
+        return self._amounts[end] - self._amounts[start], self._counts[end] - self._counts[start]
+
+class DailyAggregates:
+    """Daily buckets by transaction type and by (type, category)
+    
+    value(transaction) is the amount that is summed; by default transaction.amount.
+    """
+    
+    def __init__(self, value=None):
+        self.series: Dict[tuple, DailyTotals] = {}
+        self.value = value or (lambda transaction: transaction.amount)
+    
+    @staticmethod
+    def _keys(transaction: Transaction) -> tuple:
+        return ((transaction.transaction_type, None),
+                (transaction.transaction_type, transaction.category))
+    
+    def _group(self, transactions, sign: int = 1) -> Dict[tuple, Dict[date, List]]:
+        buckets: Dict[tuple, Dict[date, List]] = {}
+        for transaction in transactions:
+            day = transaction.date.date()
+            amount = sign * self.value(transaction)
+            for key in self._keys(transaction):
+                bucket = buckets.setdefault(key, {}).setdefault(day, [0.0, 0])
+                bucket[0] += amount
+                bucket[1] += sign
+        return buckets
+    
+    def rebuild(self, transactions: List[Transaction]):
+        buckets = self._group(transactions)
+        self.series = {key: DailyTotals.from_buckets(days) for key, days in buckets.items()}
+    
+    def add_many(self, transactions: List[Transaction], sign: int = 1):
+        for key, days in self._group(transactions, sign).items():
+            if key not in self.series:
+                self.series[key] = DailyTotals()
+            self.series[key].add_many(days)
+    
+    def add(self, transaction: Transaction, sign: int = 1):
+        day = transaction.date.date()
+        amount = sign * self.value(transaction)
+        for key in self._keys(transaction):
+            if key not in self.series:
+                self.series[key] = DailyTotals()
+            self.series[key].add(day, amount, sign)
+    
+    def query(self, transaction_type: TransactionType, first_day: Optional[date],
+              last_day: Optional[date], category: Optional[str] = None) -> Tuple[float, int]:
+        series = self.series.get((transaction_type, category))
+        if series is None:
+            return 0.0, 0
+        return series.query(first_day, last_day)
+    
+    def categories(self, transaction_type: TransactionType) -> List[str]:
+        return [key[1] for key in self.series if key[0] == transaction_type and key[1] is not None]
+
+class ColumnarAnalytics:
+    """Period and category statistics computed over a TransactionColumns snapshot
+    
+    Uses NumPy masks and bincount when NumPy is installed, and an equivalent
+    pure Python loop otherwise. Both paths return the same structure as
+    FinanceData.range_stats. amounts, when given, replaces columns.amounts,
+    e.g. with the output of converted_amounts.
+    """
+    
+    def __init__(self, columns: TransactionColumns, use_numpy: Optional[bool] = None,
+                 amounts: Optional[Sequence[float]] = None):
+        numpy = _numpy()
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ImportError("NumPy is not installed")
+        self.columns = columns
+        self.use_numpy = use_numpy
+        self.amounts = columns.amounts if amounts is None else amounts
+        if use_numpy:
+            # A mapped history never changes, so its buffers are used in place;
+            # other columns are copied so the source arrays can keep growing
+            convert = np.frombuffer if isinstance(columns, MappedColumns) else np.array
+            self._amounts = (convert(columns.amounts, dtype=np.float64) if amounts is None
+                             else np.asarray(amounts, dtype=np.float64))
+            self._dates = convert(columns.dates, dtype=np.int64)
+            self._types = convert(columns.types, dtype=np.uint8)
+            self._codes = convert(columns.category_codes, dtype=np.uint16)
+    
+    def get_period_stats(self, days: int = 30) -> Dict:
+        stats = self.range_stats(datetime.now() - timedelta(days=days))
+        del stats['categories']
+        return stats
+    
+    def get_category_stats(self, transaction_type: TransactionType, days: int = 30) -> Dict:
+        return self.range_stats(datetime.now() - timedelta(days=days))['categories'][transaction_type]
+    
+    def range_stats(self, start: Union[date, datetime, None] = None,
+                    end: Union[date, datetime, None] = None) -> Dict:
+        lo, hi = range_bounds(start, end)
+        lo = None if lo is None else TransactionColumns.to_epoch(lo)
+        hi = None if hi is None else TransactionColumns.to_epoch(hi)
+        start, end = 0, len(self.columns)
+        if self.columns.sorted_by_date:
+            # Only the rows inside the range are visited
+            if lo is not None:
+                start = bisect_left(self.columns.dates, lo)
+            if hi is not None:
+                end = bisect_left(self.columns.dates, hi)
+        if self.use_numpy:
+            per_type = self._numpy_totals(lo, hi, start, end)
+        else:
+            per_type = self._python_totals(lo, hi, start, end)
+        
+        stats = empty_range_stats()
+        for transaction_type, (amounts, counts) in per_type.items():
+            for code, count in enumerate(counts):
+                accumulate_stats(stats, transaction_type, self.columns.categories[code], amounts[code], count)
+        stats['balance'] = stats['income'] - stats['expenses']
+        return stats
+    
+    def _numpy_totals(self, lo: Optional[int], hi: Optional[int], start: int, end: int) -> Dict:
+        dates, types = self._dates[start:end], self._types[start:end]
+        all_codes, weights = self._codes[start:end], self._amounts[start:end]
+        in_range = np.ones(len(dates), dtype=bool)
+        if lo is not None:
+            in_range &= dates >= lo
+        if hi is not None:
+            in_range &= dates < hi
+        size = len(self.columns.categories)
+        per_type = {}
+        for transaction_type, type_code in TransactionColumns.TYPE_CODES.items():
+            mask = in_range & (types == type_code)
+            codes = all_codes[mask]
+            amounts = np.bincount(codes, weights=weights[mask], minlength=size)
+            counts = np.bincount(codes, minlength=size)
+            per_type[transaction_type] = (amounts.tolist(), counts.tolist())
+        return per_type
+    
+    def _python_totals(self, lo: Optional[int], hi: Optional[int], start: int, end: int) -> Dict:
+        size = len(self.columns.categories)
+        totals = [([0.0] * size, [0] * size) for _ in TransactionColumns.TYPES]
+        columns = self.columns
+        for amount, when, type_code, code in zip(self.amounts[start:end], columns.dates[start:end],
+                                                 columns.types[start:end], columns.category_codes[start:end]):
+            if (lo is None or when >= lo) and (hi is None or when < hi):
+                amounts, counts = totals[type_code]
+                amounts[code] += amount
+                counts[code] += 1
+        return {transaction_type: totals[type_code]
+                for transaction_type, type_code in TransactionColumns.TYPE_CODES.items()}
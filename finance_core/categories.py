@@ -0,0 +1,192 @@
+"""Category registry: emoji, type, color, code and budget of every category by name"""
+import json
+import logging
+import os
+from typing import List, Dict, Optional, Tuple
+
+from .models import EXPENSE_CATEGORIES, INCOME_CATEGORIES, TransactionType
+
+logger = logging.getLogger(__name__)
+
+class Category:
+    """One category and how it is shown"""
+
+    __slots__ = ('name', 'emoji', 'transaction_type', 'color', 'code', 'budget', 'builtin')
+
+    def __init__(self, name: str, emoji: str, transaction_type: TransactionType, color: str,
+                 code: int, budget: Optional[float] = None, builtin: bool = False):
+        self.name = name
+        self.emoji = emoji
+        self.transaction_type = transaction_type
+        self.color = color
+        # Stable small integer, used as the category's index in columnar tables
+        self.code = code
+        # Spending (or income) target per month; None when not set
+        self.budget = budget
+        self.builtin = builtin
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'emoji': self.emoji,
+            'transaction_type': self.transaction_type.value,
+            'color': self.color,
+            'code': self.code,
+            'budget': self.budget
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Category':
+        return cls(data['name'], data['emoji'], TransactionType(data['transaction_type']), data['color'],
+                   data['code'], data.get('budget'))
+
+class CategoryRegistry:
+    """Every known category by name, with O(1) lookups
+
+    The built-in categories take codes 0.. in INCOME_CATEGORIES +
+    EXPENSE_CATEGORIES order. User categories, and budgets or colors set on
+    built-in ones, are saved to path when one is given. Names seen in data
+    but never registered (e.g. from an import) get a code from code_of()
+    without becoming categories. A saved user category whose code is taken,
+    e.g. by a built-in category added since, is moved to a free code.
+    """
+
+    PALETTE = ("#4ECDC4", "#FF6B6B", "#45B7D1", "#96CEB4", "#FFA07A", "#9B59B6",
+               "#F7DC6F", "#5D6D7E", "#58D68D", "#EC7063", "#5DADE2", "#F5B041")
+    DEFAULT_EMOJI = {TransactionType.INCOME: "💰", TransactionType.EXPENSE: "💸"}
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._by_name: Dict[str, Category] = {}
+        self._by_type: Dict[TransactionType, List[Category]] = {t: [] for t in TransactionType}
+        # Category names by code; unregistered names are appended by code_of
+        self.table: List[str] = []
+        self._codes: Dict[str, int] = {}
+        # Bumped on every change, so callers can tell their cached menus are stale
+        self.version = 0
+        for transaction_type, pairs in ((TransactionType.INCOME, INCOME_CATEGORIES),
+                                        (TransactionType.EXPENSE, EXPENSE_CATEGORIES)):
+            for emoji, name in pairs:
+                code = len(self.table)
+                self._register(Category(name, emoji, transaction_type, self.PALETTE[code % len(self.PALETTE)],
+                                        code, builtin=True))
+        self._builtin_defaults = {name: (c.color, c.budget) for name, c in self._by_name.items()}
+        if path is not None:
+            self.load()
+
+    def _register(self, category: Category):
+        self._by_name[category.name] = category
+        self._by_type[category.transaction_type].append(category)
+        while len(self.table) <= category.code:
+            self.table.append("")
+        self.table[category.code] = category.name
+        self._codes[category.name] = category.code
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f).get('categories', [])
+            moved = False
+            for record in sorted(records, key=lambda record: record['code']):
+                existing = self._by_name.get(record['name'])
+                if existing is not None and existing.builtin:
+                    existing.color = record.get('color', existing.color)
+                    existing.budget = record.get('budget')
+                elif existing is not None:
+                    logger.warning("Category %r is saved twice in %s; keeping the first", record['name'], self.path)
+                else:
+                    category = Category.from_dict(record)
+                    if category.code < len(self.table) and self.table[category.code]:
+                        logger.warning("Category %r has code %d, already used by %r; moving it to code %d",
+                                       category.name, category.code, self.table[category.code], len(self.table))
+                        category.code = self.code_of(category.name)
+                        moved = True
+                    self._register(category)
+            self.version += 1
+            if moved:
+                self.save()
+        except Exception as e:
+            print(f"Error loading categories: {e}")
+
+    def save(self):
+        if self.path is None:
+            return
+        records = [c.to_dict() for c in self._by_name.values()
+                   if not c.builtin or self._builtin_defaults[c.name] != (c.color, c.budget)]
+        temp_file = self.path + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'categories': records}, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+
+    def get(self, name: str) -> Optional[Category]:
+        return self._by_name.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def emoji(self, name: str, transaction_type: TransactionType = TransactionType.INCOME) -> str:
+        category = self._by_name.get(name)
+        return category.emoji if category is not None else self.DEFAULT_EMOJI[transaction_type]
+
+    def of_type(self, transaction_type: TransactionType) -> List[Category]:
+        return self._by_type[transaction_type]
+
+    def names(self, transaction_type: TransactionType) -> List[str]:
+        return [c.name for c in self._by_type[transaction_type]]
+
+    def pairs(self, transaction_type: TransactionType) -> List[Tuple[str, str]]:
+        """(emoji, name) pairs in menu order, like INCOME_CATEGORIES"""
+        return [(c.emoji, c.name) for c in self._by_type[transaction_type]]
+
+    def code_of(self, name: str) -> int:
+        """Code of a category name, assigning the next free code to a name not seen before"""
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.table)
+            self.table.append(name)
+        return code
+
+    def add(self, name: str, emoji: str, transaction_type: TransactionType, color: Optional[str] = None,
+            budget: Optional[float] = None) -> Category:
+        """Register and save a user category; raises ValueError if the name is taken"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Category name is empty")
+        if name in self._by_name:
+            raise ValueError(f"Category already exists: {name}")
+        # A name already seen in data keeps its code, so existing columns stay valid
+        code = self.code_of(name)
+        category = Category(name, emoji, transaction_type, color or self.PALETTE[code % len(self.PALETTE)],
+                            code, budget)
+        self._register(category)
+        self.version += 1
+        self.save()
+        return category
+
+    def remove(self, name: str) -> bool:
+        """Unregister a user category; its code stays reserved for rows that still use it"""
+        category = self._by_name.get(name)
+        if category is None or category.builtin:
+            return False
+        del self._by_name[name]
+        self._by_type[category.transaction_type].remove(category)
+        self.version += 1
+        self.save()
+        return True
+
+    def update(self, name: str, **changes) -> bool:
+        """Change emoji, color or budget of a category and save"""
+        category = self._by_name.get(name)
+        if category is None:
+            return False
+        for key, value in changes.items():
+            if key not in ('emoji', 'color', 'budget') or (key == 'emoji' and category.builtin):
+                raise ValueError(f"Cannot change {key} of {name}")
+            setattr(category, key, value)
+        self.version += 1
+        self.save()
+        return True
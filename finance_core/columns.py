@@ -0,0 +1,508 @@
+"""Column-oriented transaction storage and the snapshot codecs that read and write it"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from itertools import accumulate, islice
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Iterator, Tuple
+
+from .models import EXPENSE_CATEGORIES, INCOME_CATEGORIES, Transaction, TransactionType
+
+class TransactionColumns:
+    """Columnar, array-backed copy of a transaction history
+    
+    Rows are stored as parallel typed arrays; Transaction objects are only
+    built when a row is read. FinanceData's mapped mode keeps its history in
+    this form (as MappedColumns); the other modes hold Transaction objects.
+    """
+    
+    EPOCH = datetime(1970, 1, 1)
+    TYPES = (TransactionType.INCOME, TransactionType.EXPENSE)
+    TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(TYPES)}
+    ID_WIDTH = 8
+    # Set when rows are known to be in date order, so ranges can be found by bisection
+    sorted_by_date = False
+    
+    def __init__(self, categories: Optional[List[str]] = None):
+        self.amounts = array('d')
+        self.dates = array('q')       # microseconds since EPOCH
+        self.created = array('q')
+        self.types = array('B')
+        self.category_codes = array('H')
+        self.description_codes = array('I')
+        self.currency_codes = array('H')
+        self._ids = bytearray()
+        self._long_ids: Dict[int, str] = {}  # rows whose id does not fit ID_WIDTH
+        # Codes index into the category table, by default the built-in categories
+        # (a CategoryRegistry's table gives its codes); unknown names are appended
+        if categories is None:
+            categories = [name for _, name in INCOME_CATEGORIES + EXPENSE_CATEGORIES]
+        self.categories: List[str] = list(categories)
+        self._category_codes = {name: code for code, name in enumerate(self.categories)}
+        self.strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        # Code 0 is "" for rows without a currency of their own
+        self.currencies: List[str] = [""]
+        self._currency_codes = {"": 0}
+    
+    @classmethod
+    def from_transactions(cls, transactions, categories: Optional[List[str]] = None) -> 'TransactionColumns':
+        columns = cls(categories)
+        columns.extend(transactions)
+        return columns
+    
+    @classmethod
+    def to_epoch(cls, value: datetime) -> int:
+        return (value - cls.EPOCH) // timedelta(microseconds=1)
+    
+    @classmethod
+    def from_epoch(cls, value: int) -> datetime:
+        return cls.EPOCH + timedelta(microseconds=value)
+    
+    def _intern(self, table: List[str], codes: Dict[str, int], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+    
+    def append(self, transaction: Transaction):
+        row = len(self.amounts)
+        self.amounts.append(transaction.amount)
+        self.dates.append(self.to_epoch(transaction.date))
+        self.created.append(self.to_epoch(transaction.created_at))
+        self.types.append(self.TYPE_CODES[transaction.transaction_type])
+        self.category_codes.append(self._intern(self.categories, self._category_codes, transaction.category))
+        self.description_codes.append(self._intern(self.strings, self._string_codes, transaction.description))
+        self.currency_codes.append(self._intern(self.currencies, self._currency_codes, transaction.currency or ""))
+        encoded = transaction.id.encode('utf-8')
+        if len(encoded) > self.ID_WIDTH:
+            self._long_ids[row] = transaction.id
+            encoded = b''
+        self._ids += encoded.ljust(self.ID_WIDTH, b'\0')
+    
+    def extend(self, transactions, chunk_size: int = 10000):
+        """Append many rows, filling each column for a chunk of rows at a time"""
+        rows = iter(transactions)
+        micro = timedelta(microseconds=1)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            first_row = len(self.amounts)
+            self.amounts.extend([t.amount for t in chunk])
+            self.dates.extend([(t.date - self.EPOCH) // micro for t in chunk])
+            self.created.extend([(t.created_at - self.EPOCH) // micro for t in chunk])
+            self.types.extend([self.TYPE_CODES[t.transaction_type] for t in chunk])
+            
+            codes, table = self._category_codes, self.categories
+            self.category_codes.extend([codes[t.category] if t.category in codes
+                                        else self._intern(table, codes, t.category) for t in chunk])
+            codes, table = self._string_codes, self.strings
+            self.description_codes.extend([codes[t.description] if t.description in codes
+                                           else self._intern(table, codes, t.description) for t in chunk])
+            codes, table = self._currency_codes, self.currencies
+            self.currency_codes.extend([codes[t.currency or ""] if (t.currency or "") in codes
+                                        else self._intern(table, codes, t.currency) for t in chunk])
+            
+            encoded = [t.id.encode('utf-8') for t in chunk]
+            for row, value in enumerate(encoded, first_row):
+                if len(value) > self.ID_WIDTH:
+                    self._long_ids[row] = value.decode('utf-8')
+            self._ids += b''.join((b'' if len(value) > self.ID_WIDTH else value).ljust(self.ID_WIDTH, b'\0')
+                                  for value in encoded)
+    
+    def __len__(self) -> int:
+        return len(self.amounts)
+    
+    def __getitem__(self, row: int) -> Transaction:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("row out of range")
+        return self.row(row)
+    
+    def __iter__(self) -> Iterator[Transaction]:
+        for row in range(len(self)):
+            yield self.row(row)
+    
+    def transaction_id(self, row: int) -> str:
+        if row in self._long_ids:
+            return self._long_ids[row]
+        start = row * self.ID_WIDTH
+        return self._ids[start:start + self.ID_WIDTH].rstrip(b'\0').decode('utf-8')
+    
+    def id_keys(self) -> array:
+        """Each row's fixed-width id read as an unsigned 64-bit little-endian key"""
+        keys = array('Q', bytes(self._ids))
+        if sys.byteorder != 'little':
+            keys.byteswap()
+        return keys
+    
+    def id_order(self) -> array:
+        """Row numbers sorted by id key, as BinaryCodec stores them"""
+        keys = self.id_keys()
+        return array(BinaryCodec.ID_ORDER, sorted(range(len(keys)), key=keys.__getitem__))
+    
+    def row(self, row: int) -> Transaction:
+        """Materialize one row as a Transaction"""
+        transaction = Transaction.__new__(Transaction)
+        transaction.id = self.transaction_id(row)
+        transaction.amount = self.amounts[row]
+        transaction.description = self.strings[self.description_codes[row]]
+        transaction.transaction_type = self.TYPES[self.types[row]]
+        transaction.category = self.categories[self.category_codes[row]]
+        transaction.date = self.from_epoch(self.dates[row])
+        transaction.created_at = self.from_epoch(self.created[row])
+        transaction.currency = self.currencies[self.currency_codes[row]] or None
+        return transaction
+    
+    def to_transactions(self, start: int = 0, end: Optional[int] = None) -> List[Transaction]:
+        """Materialize rows start..end at once, a column at a time; much faster than row() in a loop"""
+        end = len(self) if end is None else min(end, len(self))
+        start = min(start, end)
+        width = self.ID_WIDTH
+        raw = bytes(self._ids[start * width:end * width])
+        ids = [raw[offset:offset + width].rstrip(b'\0').decode('utf-8') for offset in range(0, len(raw), width)]
+        for row, value in self._long_ids.items():
+            if start <= row < end:
+                ids[row - start] = value
+        dates = [self.EPOCH + timedelta(0, 0, value) for value in self.dates[start:end]]
+        created = [self.EPOCH + timedelta(0, 0, value) for value in self.created[start:end]]
+        descriptions = list(map(self.strings.__getitem__, self.description_codes[start:end]))
+        categories = list(map(self.categories.__getitem__, self.category_codes[start:end]))
+        types = list(map(self.TYPES.__getitem__, self.types[start:end]))
+        currencies = [code or None for code in self.currencies]
+        currencies = list(map(currencies.__getitem__, self.currency_codes[start:end]))
+        
+        transactions = []
+        new = Transaction.__new__
+        for row in zip(ids, self.amounts[start:end], descriptions, types, categories, dates, created, currencies):
+            transaction = new(Transaction)
+            (transaction.id, transaction.amount, transaction.description, transaction.transaction_type,
+             transaction.category, transaction.date, transaction.created_at, transaction.currency) = row
+            transactions.append(transaction)
+        return transactions
+    
+    def nbytes(self) -> int:
+        """Approximate size of the column buffers and string pool"""
+        arrays = (self.amounts, self.dates, self.created, self.types,
+                  self.category_codes, self.description_codes, self.currency_codes)
+        size = sum(a.buffer_info()[1] * a.itemsize for a in arrays) + len(self._ids)
+        return size + sum(len(s.encode('utf-8')) for s in self.strings)
+
+class JsonCodec:
+    """Reads and writes transactions as JSON, the interchange format"""
+    
+    binary = False
+    extension = ".json"
+    
+    def dump(self, f, transactions, meta: Optional[Dict] = None):
+        """Stream transactions to a text file; with meta, as an object holding meta too"""
+        if meta is None:
+            f.write('[')
+            self.write_records(f, transactions)
+            f.write('\n]\n')
+            return
+        f.write('{"transactions": [')
+        self.write_records(f, transactions)
+        f.write('\n]')
+        for key, value in meta.items():
+            f.write(f',\n{json.dumps(key)}: {json.dumps(value)}')
+        f.write('\n}\n')
+    
+    def load(self, f) -> Tuple[List[Transaction], Dict]:
+        """Transactions in file order, and the remaining top-level keys"""
+        data = json.load(f)
+        if isinstance(data, list):
+            return [Transaction.from_dict(item) for item in data], {}
+        return [Transaction.from_dict(item) for item in data.pop('transactions', [])], data
+    
+    @staticmethod
+    def write_records(f, transactions, chunk_size: int = 1000):
+        """Stream transactions as the items of a JSON array, one record per line"""
+        rows = iter(transactions)
+        separator = "\n"
+        while True:
+            chunk = [json.dumps(t.to_dict(), separators=(',', ':')) for t in islice(rows, chunk_size)]
+            if not chunk:
+                return
+            f.write(separator + ",\n".join(chunk))
+            separator = ",\n"
+
+class BinaryCodec:
+    """Reads and writes transactions in a compact columnar binary format
+    
+    Little-endian, every section padded to 8 bytes: a header (magic, version,
+    row count, metadata length), JSON metadata, one fixed-width column per
+    field, the rows in id order, then the category, description and currency
+    string tables. Column offsets depend only on the header, so the file can
+    also be memory-mapped. Version 1 files, written before the currency column,
+    and version 2 files, written before the id order, are still read.
+    """
+    
+    MAGIC = b"FDTX"
+    VERSION = 3
+    HEADER = struct.Struct("<4sHHQQ")
+    # Fixed-width columns in file order: TransactionColumns attribute and array typecode
+    COLUMNS = (
+        ('amounts', 'd'),            # float64
+        ('dates', 'q'),              # int64 microseconds since 1970
+        ('created', 'q'),
+        ('_ids', 'B'),               # TransactionColumns.ID_WIDTH bytes per row
+        ('description_codes', 'I'),  # uint32 index into the description table
+        ('category_codes', 'H'),     # uint16 index into the category table
+        ('types', 'B'),
+        ('currency_codes', 'H')      # uint16 index into the currency table; from version 2
+    )
+    # uint32 row numbers sorted by id, so a mapped file can find ids by bisection; from version 3
+    ID_ORDER = 'I'
+    
+    binary = True
+    extension = ".fdb"
+    
+    @staticmethod
+    def _pad(size: int) -> int:
+        return (size + 7) & ~7
+    
+    @classmethod
+    def layout(cls, rows: int, meta_length: int, version: int = VERSION) -> Dict[str, Tuple[int, int]]:
+        """Byte offset and length of each column; 'tables' is where the string tables start"""
+        offset = cls._pad(cls.HEADER.size + meta_length)
+        sections = {}
+        for name, typecode in cls.COLUMNS if version >= 2 else cls.COLUMNS[:-1]:
+            width = TransactionColumns.ID_WIDTH if name == '_ids' else array(typecode).itemsize
+            sections[name] = (offset, rows * width)
+            offset += cls._pad(rows * width)
+        if version >= 3:
+            width = array(cls.ID_ORDER).itemsize
+            sections['id_order'] = (offset, rows * width)
+            offset += cls._pad(rows * width)
+        sections['tables'] = (offset, 0)
+        return sections
+    
+    @staticmethod
+    def _write_padded(f, data: bytes):
+        f.write(data)
+        f.write(b'\0' * (-len(data) % 8))
+    
+    def _write_table(self, f, strings: List[str]):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = array('Q', [0])
+        offsets.extend(accumulate(len(s) for s in encoded))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(offsets.tobytes())
+        self._write_padded(f, b''.join(encoded))
+    
+    @classmethod
+    def _read_table(cls, view: memoryview, offset: int) -> Tuple[List[str], int]:
+        count, = struct.unpack_from("<Q", view, offset)
+        offset += 8
+        offsets = array('Q')
+        offsets.frombytes(view[offset:offset + 8 * (count + 1)])
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        offset += 8 * (count + 1)
+        blob = bytes(view[offset:offset + offsets[-1]])
+        strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)]
+        return strings, offset + cls._pad(offsets[-1])
+    
+    def dump(self, f, transactions, meta: Optional[Dict] = None):
+        """Write transactions to a file opened in binary mode"""
+        self.dump_columns(f, TransactionColumns.from_transactions(transactions), meta)
+    
+    def dump_columns(self, f, columns: TransactionColumns, meta: Optional[Dict] = None):
+        meta = dict(meta or {})
+        if columns._long_ids:
+            meta['long_ids'] = {str(row): value for row, value in columns._long_ids.items()}
+        meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+        f.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, len(columns), len(meta_bytes)))
+        self._write_padded(f, meta_bytes)
+        for name, _ in self.COLUMNS:
+            column = getattr(columns, name)
+            if isinstance(column, array) and sys.byteorder != 'little':
+                column = array(column.typecode, column)
+                column.byteswap()
+            self._write_padded(f, bytes(column))
+        order = columns.id_order()
+        if sys.byteorder != 'little':
+            order.byteswap()
+        self._write_padded(f, bytes(order))
+        self._write_table(f, columns.categories)
+        self._write_table(f, columns.strings)
+        self._write_table(f, columns.currencies)
+    
+    def load(self, f) -> Tuple[List[Transaction], Dict]:
+        """Transactions in file order, and the metadata"""
+        columns, meta = self.read_columns(f.read())
+        return columns.to_transactions(), meta
+    
+    def read_header(self, view: memoryview) -> Tuple[int, Dict, Dict[str, Tuple[int, int]]]:
+        """Row count, metadata and section layout of a file"""
+        magic, version, _, rows, meta_length = self.HEADER.unpack_from(view)
+        if magic != self.MAGIC:
+            raise ValueError("Not a binary transaction file")
+        if not 1 <= version <= self.VERSION:
+            raise ValueError(f"Unsupported binary format version {version}")
+        meta = json.loads(bytes(view[self.HEADER.size:self.HEADER.size + meta_length]))
+        return rows, meta, self.layout(rows, meta_length, version)
+    
+    def read_columns(self, buffer) -> Tuple[TransactionColumns, Dict]:
+        """Decode a whole file into a TransactionColumns without building Transactions"""
+        view = memoryview(buffer)
+        rows, meta, sections = self.read_header(view)
+        
+        columns = TransactionColumns()
+        for name, typecode in self.COLUMNS:
+            if name not in sections:
+                # A column the file's version predates; every row gets code 0
+                setattr(columns, name, array(typecode, bytes(rows * array(typecode).itemsize)))
+                continue
+            offset, length = sections[name]
+            if name == '_ids':
+                columns._ids = bytearray(view[offset:offset + length])
+                continue
+            column = array(typecode)
+            column.frombytes(view[offset:offset + length])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            setattr(columns, name, column)
+        columns._long_ids = {int(row): value for row, value in meta.pop('long_ids', {}).items()}
+        
+        offset = sections['tables'][0]
+        columns.categories, offset = self._read_table(view, offset)
+        columns._category_codes = {name: code for code, name in enumerate(columns.categories)}
+        columns.strings, offset = self._read_table(view, offset)
+        columns._string_codes = {value: code for code, value in enumerate(columns.strings)}
+        if 'currency_codes' in sections:
+            columns.currencies, offset = self._read_table(view, offset)
+            columns._currency_codes = {value: code for code, value in enumerate(columns.currencies)}
+        return columns, meta
+
+class MappedStrings:
+    """Read-only string table that decodes entries from a buffer when they are read"""
+    
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+class MappedColumns(TransactionColumns):
+    """Read-only TransactionColumns over a memory-mapped BinaryCodec file
+    
+    Columns are memoryviews into the mapping, so opening a file reads only the
+    header and the category table; rows and descriptions are decoded when read.
+    """
+    
+    def __init__(self, path: str):
+        super().__init__()
+        if sys.byteorder != 'little':
+            raise ValueError("Memory-mapped history needs a little-endian platform")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = [memoryview(self._mmap)]
+        view = self._views[0]
+        codec = BinaryCodec()
+        rows, self.meta, sections = codec.read_header(view)
+        self.sorted_by_date = self.meta.get('order') == 'date'
+        
+        for name, typecode in BinaryCodec.COLUMNS:
+            if name not in sections:
+                setattr(self, name, array(typecode, bytes(rows * array(typecode).itemsize)))
+                continue
+            offset, length = sections[name]
+            setattr(self, name, self._view(view[offset:offset + length], typecode))
+        self._ids_offset = sections['_ids'][0]
+        # Files from before version 3 have no id order; find() builds one on first use
+        self.has_id_order = 'id_order' in sections
+        self._id_order: Optional[memoryview] = None
+        if self.has_id_order:
+            offset, length = sections['id_order']
+            self._id_order = self._view(view[offset:offset + length], BinaryCodec.ID_ORDER)
+        self._long_ids = {int(row): value for row, value in self.meta.pop('long_ids', {}).items()}
+        
+        offset = sections['tables'][0]
+        self.categories, offset = codec._read_table(view, offset)
+        self._category_codes = {name: code for code, name in enumerate(self.categories)}
+        count, = struct.unpack_from("<Q", view, offset)
+        offsets = self._view(view[offset + 8:offset + 8 * (count + 2)], 'Q')
+        blob_start = offset + 8 * (count + 2)
+        self.strings = MappedStrings(offsets, self._view(view[blob_start:blob_start + offsets[-1]], 'B'))
+        if 'currency_codes' in sections:
+            self.currencies, _ = codec._read_table(view, blob_start + BinaryCodec._pad(offsets[-1]))
+            self._currency_codes = {value: code for code, value in enumerate(self.currencies)}
+        self._id_keys: Optional[memoryview] = None
+    
+    def _view(self, view: memoryview, typecode: str) -> memoryview:
+        view = view.cast(typecode)
+        self._views.append(view)
+        return view
+    
+    def append(self, transaction: Transaction):
+        raise TypeError("Memory-mapped history is read-only")
+    
+    def extend(self, transactions, chunk_size: int = 10000):
+        raise TypeError("Memory-mapped history is read-only")
+    
+    def transaction_id(self, row: int) -> str:
+        if row in self._long_ids:
+            return self._long_ids[row]
+        start = row * self.ID_WIDTH
+        return bytes(self._ids[start:start + self.ID_WIDTH]).rstrip(b'\0').decode('utf-8')
+    
+    def id_keys(self):
+        if self._id_keys is None:
+            # Ids are fixed-width, so each one reads as a single unsigned 64-bit key
+            self._id_keys = self._view(self._ids, 'Q')
+        return self._id_keys
+    
+    def id_order(self):
+        if self._id_order is None:
+            # Only files from before version 3 get here: sort every id once
+            self._id_order = super().id_order()
+        return self._id_order
+    
+    def find(self, transaction_id: str) -> Optional[int]:
+        """Row holding transaction_id, or None"""
+        for row, value in self._long_ids.items():
+            if value == transaction_id:
+                return row
+        encoded = transaction_id.encode('utf-8')
+        if len(encoded) > self.ID_WIDTH:
+            return None
+        keys, order = self.id_keys(), self.id_order()
+        key = int.from_bytes(encoded.ljust(self.ID_WIDTH, b'\0'), 'little')
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if keys[order[middle]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and keys[order[low]] == key:
+            return order[low]
+        return None
+    
+    def nbytes(self) -> int:
+        return len(self._mmap)
+    
+    def close(self):
+        """Unmap the file; rows already materialized stay valid
+        
+        NumPy arrays built over the columns must be dropped first, or the
+        mapping reports BufferError.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
@@ -0,0 +1,40 @@
+"""Change notifications sent by FinanceData to the views listing its transactions"""
+from typing import Optional
+
+from .models import Transaction
+
+class ChangeEvent:
+    """One change to FinanceData.transactions
+
+    position is an index into transactions: where an added row now is, where
+    a removed row was, or where an updated row is. The events of one batch
+    apply in order, each position counting the earlier ones as done. A reset
+    means the list changed too much to describe (a reload, or a large batch)
+    and views should rebuild it. Loaded means older stored rows were read
+    into the list: it needs rebuilding too, but the data itself, and so
+    FinanceData.version, did not change. Currency means the reporting
+    currency changed; the rows stay as they are.
+    """
+
+    ADDED = "added"
+    REMOVED = "removed"
+    UPDATED = "updated"
+    RESET = "reset"
+    LOADED = "loaded"
+    CURRENCY = "currency"
+    # Kinds after which views rebuild their rows from transactions
+    REBUILDS = (RESET, LOADED)
+
+    __slots__ = ('kind', 'transaction', 'position', 'previous')
+
+    def __init__(self, kind: str, transaction: Optional[Transaction] = None, position: Optional[int] = None,
+                 previous: Optional[Transaction] = None):
+        self.kind = kind
+        self.transaction = transaction
+        self.position = position
+        # The transaction as it was before an update
+        self.previous = previous
+
+    def __repr__(self) -> str:
+        transaction_id = None if self.transaction is None else self.transaction.id
+        return f"ChangeEvent({self.kind!r}, {transaction_id!r}, {self.position!r})"
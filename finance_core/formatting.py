@@ -0,0 +1,106 @@
+"""Display strings for amounts and dates, compiled per currency and memoized per transaction"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Tuple
+
+from .models import Currency, Transaction, TransactionType
+
+class CurrencyFormat:
+    """How amounts in one currency are written: symbol placement, decimal digits and grouping"""
+
+    __slots__ = ('code', 'symbol', 'decimals', 'symbol_after', 'indian_grouping', '_spec')
+
+    def __init__(self, code: str, symbol: str, decimals: int = 2, symbol_after: bool = False,
+                 indian_grouping: bool = False):
+        self.code = code
+        self.symbol = symbol
+        self.decimals = decimals
+        self.symbol_after = symbol_after
+        self.indian_grouping = indian_grouping
+        # Indian grouping is applied by hand to the ungrouped digits
+        self._spec = f".{decimals}f" if indian_grouping else f",.{decimals}f"
+
+    @classmethod
+    def for_currency(cls, code: str) -> 'CurrencyFormat':
+        return cls(code, Currency.get_symbol(code), Currency.DECIMALS.get(code, 2),
+                   code in Currency.SYMBOL_AFTER, code in Currency.INDIAN_GROUPING)
+
+    def number(self, amount: float) -> str:
+        """Grouped digits of abs(amount), without symbol or sign"""
+        text = format(abs(amount), self._spec)
+        if not self.indian_grouping:
+            return text
+        whole, point, fraction = text.partition(".")
+        if len(whole) > 3:
+            head, tail = whole[:-3], whole[-3:]
+            # Pairs of digits above the thousands
+            pairs = [head[max(end - 2, 0):end] for end in range(len(head), 0, -2)]
+            whole = ",".join(reversed(pairs)) + "," + tail
+        return whole + point + fraction
+
+    def format(self, amount: float, sign: str = "") -> str:
+        """amount with the currency symbol; negative amounts get "-", positive ones sign"""
+        if amount < 0:
+            sign = "-"
+        if self.symbol_after:
+            return f"{sign}{self.number(amount)} {self.symbol}"
+        return f"{sign}{self.symbol}{self.number(amount)}"
+
+class DisplayFormatter:
+    """Formats amounts and dates for list rows
+
+    Currency formats are compiled on first use, and the strings of each
+    transaction are memoized by id, so rebuilding a long list only formats
+    rows it has not shown before. Rows are written in their own currency,
+    so changing the reporting currency keeps them; forget() drops a row after
+    it is edited or deleted and clear() drops them all.
+    """
+
+    DATE_FORMAT = "%Y-%m-%d"
+
+    def __init__(self, date_format: str = DATE_FORMAT, cache_size: int = 100_000):
+        self.date_format = date_format
+        self.cache_size = cache_size
+        self._formats: Dict[str, CurrencyFormat] = {}
+        self._rows: Dict[str, Tuple[str, str]] = {}
+        # Rows of the same day share one date string
+        self._dates: Dict[date, str] = {}
+
+    def currency_format(self, code: str) -> CurrencyFormat:
+        currency_format = self._formats.get(code)
+        if currency_format is None:
+            currency_format = self._formats[code] = CurrencyFormat.for_currency(code)
+        return currency_format
+
+    def format_amount(self, amount: float, code: str, sign: str = "") -> str:
+        return self.currency_format(code).format(amount, sign)
+
+    def format_date(self, when: datetime) -> str:
+        day = when.date()
+        text = self._dates.get(day)
+        if text is None:
+            text = self._dates[day] = day.strftime(self.date_format)
+        return text
+
+    def row_strings(self, transaction: Transaction, default_code: str) -> Tuple[str, str]:
+        """Signed amount ("+$5.00" or "-$5.00") and date of a transaction
+
+        default_code is the currency of transactions that do not name one.
+        """
+        strings = self._rows.get(transaction.id)
+        if strings is None:
+            sign = "+" if transaction.transaction_type == TransactionType.INCOME else "-"
+            code = transaction.currency or default_code
+            strings = (self.currency_format(code).format(transaction.amount, sign),
+                       self.format_date(transaction.date))
+            if len(self._rows) >= self.cache_size:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self._rows[next(iter(self._rows))]
+            self._rows[transaction.id] = strings
+        return strings
+
+    def forget(self, transaction_ids: Iterable[str]):
+        for transaction_id in transaction_ids:
+            self._rows.pop(transaction_id, None)
+
+    def clear(self):
+        self._rows.clear()
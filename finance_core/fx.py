@@ -0,0 +1,99 @@
+"""Historical exchange rates from a local file, with memoized conversion factors"""
+import json
+import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import List, Dict, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class ExchangeRates:
+    """Daily rate tables quoted against one anchor currency
+
+    The rates file is JSON: {"base": "USD", "rates": {"EUR": {"2024-01-02": 0.91, ...}}},
+    each rate being units of that currency per unit of base. A day without a
+    quote (weekends, holidays) uses the latest earlier one. Conversion factors
+    are memoized per (source, target, day) in a cache that evicts the least
+    recently used entry once it holds cache_size of them. Pairs that could
+    not be converted for want of a rate are collected in missing.
+    """
+
+    def __init__(self, base: str = "USD", rates: Optional[Dict[str, Dict[str, float]]] = None,
+                 cache_size: int = 65536):
+        self.base = base
+        # Per currency: quote days as ordinals, ascending, and the rate on each
+        self.tables: Dict[str, Tuple[List[int], List[float]]] = {}
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # (source, target) pairs asked for without a rate for one of them
+        self.missing: Set[Tuple[str, str]] = set()
+        for code, quotes in (rates or {}).items():
+            self.set_rates(code, quotes)
+
+    @classmethod
+    def load(cls, path: str, cache_size: int = 65536) -> 'ExchangeRates':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('base', "USD"), data.get('rates', {}), cache_size)
+
+    def save(self, path: str):
+        rates = {code: {date.fromordinal(day).isoformat(): rate for day, rate in zip(*table)}
+                 for code, table in sorted(self.tables.items())}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'base': self.base, 'rates': rates}, f, indent=2)
+
+    def set_rates(self, code: str, quotes: Dict[Union[str, date], float]):
+        """Replace the table of one currency; keys are dates or ISO date strings"""
+        pairs = sorted((date.fromisoformat(day[:10]) if isinstance(day, str) else day, float(rate))
+                       for day, rate in quotes.items())
+        self.tables[code] = ([day.toordinal() for day, _ in pairs], [rate for _, rate in pairs])
+        self._cache.clear()
+        self.missing = {pair for pair in self.missing if code not in pair}
+
+    def currencies(self) -> List[str]:
+        return sorted({self.base, *self.tables})
+
+    def rate(self, code: str, day: date) -> Optional[float]:
+        """Units of code per unit of base on day, or None without any quote for code"""
+        if code == self.base:
+            return 1.0
+        table = self.tables.get(code)
+        if table is None or not table[0]:
+            return None
+        days, rates = table
+        # Days before the first quote use the first one
+        position = max(bisect_right(days, day.toordinal()), 1)
+        return rates[position - 1]
+
+    def factor(self, source: str, target: str, day: date) -> Optional[float]:
+        """Multiplier turning an amount in source on day into target, or None when a rate is missing"""
+        if source == target:
+            return 1.0
+        key = (source, target, day)
+        cache = self._cache
+        if key in cache:
+            cache.move_to_end(key)
+            self.hits += 1
+            return cache[key]
+        self.misses += 1
+        source_rate, target_rate = self.rate(source, day), self.rate(target, day)
+        if source_rate is None or target_rate is None:
+            if (source, target) not in self.missing:
+                self.missing.add((source, target))
+                logger.warning("No exchange rates for %s; %s amounts are not converted to %s",
+                               source if source_rate is None else target, source, target)
+            value = None
+        else:
+            value = target_rate / source_rate
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def convert(self, amount: float, source: str, target: str, day: date) -> Optional[float]:
+        """amount in target, or None when a rate is missing"""
+        value = self.factor(source, target, day)
+        return None if value is None else amount * value
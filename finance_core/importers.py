@@ -0,0 +1,237 @@
+"""Streaming bank statement import (CSV, OFX, QIF)"""
+import csv
+import os
+import re
+from datetime import datetime
+from typing import List, Dict, Optional, Iterator, Tuple
+
+from .models import Transaction, TransactionType
+from .storage import FinanceData
+
+class StatementImporter:
+    """Streams bank statements (CSV, OFX, QIF) into FinanceData in batches
+    
+    Parsers are generators, so only one batch of rows is held in memory at a
+    time. Each batch is validated and then committed with a single
+    persistence write.
+    """
+    
+    DEFAULT_COLUMNS = {
+        'date': 'Date',
+        'amount': 'Amount',
+        'description': 'Description',
+        'category': 'Category',
+        'currency': 'Currency'
+    }
+    DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%Y%m%d", "%m/%d/%y", "%d-%b-%Y")
+    FORMATS = {'.csv': 'csv', '.ofx': 'ofx', '.qfx': 'ofx', '.qif': 'qif'}
+    MAX_ERRORS = 50
+    
+    def __init__(self, data: FinanceData, columns: Optional[Dict[str, str]] = None,
+                 category_map: Optional[Dict[str, str]] = None, date_format: Optional[str] = None,
+                 batch_size: int = 1000, progress=None, delimiter: str = ",",
+                 currency: Optional[str] = None):
+        """
+        columns maps 'date', 'amount', 'description', 'category', 'currency'
+        (or 'debit' and 'credit' instead of 'amount') to CSV header names.
+        currency applies to rows without one of their own; by default the
+        data's reporting currency.
+        category_map maps a statement category, or a keyword found in the
+        description, to one of the data's category names.
+        progress(imported, skipped, fraction) is called after every batch;
+        fraction is None when the input size is unknown.
+        """
+        self.data = data
+        self.columns = dict(self.DEFAULT_COLUMNS, **(columns or {}))
+        self.category_map = {key.lower(): value for key, value in (category_map or {}).items()}
+        self.date_format = date_format
+        self.batch_size = batch_size
+        self.progress = progress
+        self.delimiter = delimiter
+        self.currency = currency
+        # Includes the user's own categories
+        self._income_names = set(data.categories.names(TransactionType.INCOME))
+        self._expense_names = set(data.categories.names(TransactionType.EXPENSE))
+    
+    def import_file(self, path: str, file_format: Optional[str] = None) -> Dict:
+        """Import a statement file; the format defaults to the file extension"""
+        file_format = file_format or self.FORMATS.get(os.path.splitext(path)[1].lower())
+        parsers = {'csv': self.iter_csv, 'ofx': self.iter_ofx, 'qif': self.iter_qif}
+        if file_format not in parsers:
+            raise ValueError(f"Unsupported statement format: {path}")
+        total_size = os.path.getsize(path)
+        newline = '' if file_format == 'csv' else None
+        with open(path, 'r', encoding='utf-8-sig', errors='replace', newline=newline) as handle:
+            def fraction():
+                return min(handle.buffer.tell() / total_size, 1.0) if total_size else 1.0
+            return self.import_rows(parsers[file_format](handle), fraction)
+    
+    def import_rows(self, rows, fraction=None) -> Dict:
+        """Validate and commit (line, fields) pairs produced by one of the parsers"""
+        report = {'imported': 0, 'skipped': 0, 'errors': []}
+        batch: List[Transaction] = []
+        for line, fields in rows:
+            try:
+                batch.append(self.to_transaction(fields))
+            except ValueError as e:
+                report['skipped'] += 1
+                if len(report['errors']) < self.MAX_ERRORS:
+                    report['errors'].append(f"line {line}: {e}")
+            if len(batch) >= self.batch_size:
+                self._commit(batch, report, fraction)
+                batch = []
+        if batch or not report['imported']:
+            self._commit(batch, report, fraction)
+        elif self.progress:
+            self.progress(report['imported'], report['skipped'], 1.0 if fraction else None)
+        return report
+    
+    def _commit(self, batch: List[Transaction], report: Dict, fraction):
+        if self.data.add_transactions(batch):
+            report['imported'] += len(batch)
+        else:
+            report['skipped'] += len(batch)
+            if len(report['errors']) < self.MAX_ERRORS:
+                report['errors'].append(f"a batch of {len(batch)} rows could not be saved")
+        if self.progress:
+            self.progress(report['imported'], report['skipped'], fraction() if fraction else None)
+    
+    def to_transaction(self, fields: Dict) -> Transaction:
+        """Map one parsed row to a Transaction, raising ValueError if it is invalid"""
+        amount = fields.get('amount')
+        if amount is None:
+            amount = self.parse_amount(fields.get('credit')) - self.parse_amount(fields.get('debit'))
+        else:
+            amount = self.parse_amount(amount)
+        if amount == 0:
+            raise ValueError("missing or zero amount")
+        transaction_type = TransactionType.INCOME if amount > 0 else TransactionType.EXPENSE
+        
+        description = (fields.get('description') or fields.get('memo') or "").strip()
+        if not description:
+            raise ValueError("missing description")
+        category = self.map_category(fields.get('category'), description, transaction_type)
+        currency = (fields.get('currency') or "").strip().upper() or self.currency
+        return Transaction(amount, description, transaction_type, category, self.parse_date(fields.get('date')),
+                           currency)
+    
+    @staticmethod
+    def parse_amount(value) -> float:
+        if value is None:
+            return 0.0
+        text = str(value).strip()
+        if not text:
+            return 0.0
+        negative = text.startswith('(') and text.endswith(')')
+        text = re.sub(r"[^0-9.,+-]", "", text)
+        # The last separator is the decimal point (1,234.56 or 1.234,56) unless it is repeated
+        # (1.234.567) or a lone comma before three digits (1,234); the other one groups thousands
+        last = max(text.rfind('.'), text.rfind(','))
+        decimal = text[last] if last >= 0 else '.'
+        if text.count(decimal) > 1 or (decimal == ',' and '.' not in text and len(text) - last == 4):
+            decimal = '.' if decimal == ',' else ','
+        thousands = ',' if decimal == '.' else '.'
+        if not re.fullmatch(rf"[+-]?(\d{{1,3}}(\{thousands}\d{{3}})+|\d*)(\{decimal}\d*)?", text):
+            raise ValueError(f"invalid amount {value!r}")
+        text = text.replace(thousands, '').replace(decimal, '.')
+        try:
+            amount = float(text)
+        except ValueError:
+            raise ValueError(f"invalid amount {value!r}")
+        return -abs(amount) if negative else amount
+    
+    def parse_date(self, value) -> datetime:
+        text = (value or "").strip()
+        if not text:
+            raise ValueError("missing date")
+        if self.date_format:
+            try:
+                return datetime.strptime(text, self.date_format)
+            except ValueError:
+                raise ValueError(f"invalid date {text!r}")
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+        for date_format in self.DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+        raise ValueError(f"invalid date {text!r}")
+    
+    def map_category(self, source: Optional[str], description: str,
+                     transaction_type: TransactionType) -> str:
+        known = self._income_names if transaction_type == TransactionType.INCOME else self._expense_names
+        source = (source or "").strip()
+        mapped = self.category_map.get(source.lower())
+        if mapped in known:
+            return mapped
+        if source in known:
+            return source
+        lowered = description.lower()
+        for keyword, category in self.category_map.items():
+            if keyword in lowered and category in known:
+                return category
+        return "Other Income" if transaction_type == TransactionType.INCOME else "Other Expense"
+    
+    def iter_csv(self, handle) -> Iterator[Tuple[int, Dict]]:
+        reader = csv.DictReader(handle, delimiter=self.delimiter)
+        for row in reader:
+            yield reader.line_num, {field: row.get(column) for field, column in self.columns.items()}
+    
+    def iter_ofx(self, handle) -> Iterator[Tuple[int, Dict]]:
+        """OFX 1.x (SGML) and 2.x (XML) <STMTTRN> records"""
+        tag_pattern = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+        current = None
+        start_line = 0
+        # <CURDEF> gives the currency of the statement's transactions
+        statement_currency = None
+        for line_number, line in enumerate(handle, 1):
+            for closing, tag, value in tag_pattern.findall(line):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if closing and current is not None:
+                        yield start_line, {
+                            'date': (current.get('DTPOSTED') or "")[:8],
+                            'amount': current.get('TRNAMT'),
+                            'description': current.get('NAME') or current.get('PAYEE'),
+                            'memo': current.get('MEMO'),
+                            'category': None,
+                            'currency': statement_currency
+                        }
+                        current = None
+                    elif not closing:
+                        current = {}
+                        start_line = line_number
+                elif tag == 'CURDEF' and not closing and value.strip():
+                    statement_currency = value.strip()
+                elif current is not None and not closing and value.strip():
+                    current[tag] = value.strip()
+    
+    def iter_qif(self, handle) -> Iterator[Tuple[int, Dict]]:
+        current = {}
+        start_line = 1
+        for line_number, line in enumerate(handle, 1):
+            line = line.rstrip("\r\n")
+            if not line or line.startswith('!'):
+                continue
+            code, value = line[0], line[1:].strip()
+            if code == '^':
+                if current:
+                    yield start_line, current
+                current = {}
+                start_line = line_number + 1
+            elif code == 'D':
+                # QIF writes years after 1999 as 1/15'24
+                current['date'] = re.sub(r"'\s*(\d{2})$", r"/20\1", value).replace(' ', '0')
+            elif code in ('T', 'U'):
+                current['amount'] = value
+            elif code == 'P':
+                current['description'] = value
+            elif code == 'M':
+                current['memo'] = value
+            elif code == 'L':
+                current['category'] = value.strip('[]')
+        if current:
+            yield start_line, current
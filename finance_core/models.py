@@ -0,0 +1,212 @@
+"""Transactions, transaction types, currencies and the built-in categories"""
+import os
+from datetime import datetime
+from typing import Dict, Optional
+from enum import Enum
+
+class TransactionType(Enum):
+    INCOME = "income"
+    EXPENSE = "expense"
+
+class Currency:
+    """Currency information"""
+    
+    CURRENCIES = {
+        "INR": {"symbol": "₹", "name": "Indian Rupee", "code": "INR"},
+        "USD": {"symbol": "$", "name": "US Dollar", "code": "USD"},
+        "EUR": {"symbol": "€", "name": "Euro", "code": "EUR"},
+        "GBP": {"symbol": "£", "name": "British Pound", "code": "GBP"},
+        "JPY": {"symbol": "¥", "name": "Japanese Yen", "code": "JPY"},
+        "AUD": {"symbol": "A$", "name": "Australian Dollar", "code": "AUD"},
+        "CAD": {"symbol": "C$", "name": "Canadian Dollar", "code": "CAD"},
+        "CHF": {"symbol": "Fr", "name": "Swiss Franc", "code": "CHF"},
+        "CNY": {"symbol": "¥", "name": "Chinese Yuan", "code": "CNY"},
+        "KRW": {"symbol": "₩", "name": "South Korean Won", "code": "KRW"},
+        "SGD": {"symbol": "S$", "name": "Singapore Dollar", "code": "SGD"},
+        "HKD": {"symbol": "HK$", "name": "Hong Kong Dollar", "code": "HKD"},
+        "MXN": {"symbol": "MX$", "name": "Mexican Peso", "code": "MXN"},
+        "BRL": {"symbol": "R$", "name": "Brazilian Real", "code": "BRL"},
+        "RUB": {"symbol": "₽", "name": "Russian Ruble", "code": "RUB"},
+        "SAR": {"symbol": "ر.س", "name": "Saudi Riyal", "code": "SAR"},
+        "AED": {"symbol": "د.إ", "name": "UAE Dirham", "code": "AED"},
+        "ZAR": {"symbol": "R", "name": "South African Rand", "code": "ZAR"},
+        "THB": {"symbol": "฿", "name": "Thai Baht", "code": "THB"},
+        "IDR": {"symbol": "Rp", "name": "Indonesian Rupiah", "code": "IDR"},
+        "MYR": {"symbol": "RM", "name": "Malaysian Ringgit", "code": "MYR"},
+        "PHP": {"symbol": "₱", "name": "Philippine Peso", "code": "PHP"},
+        "VND": {"symbol": "₫", "name": "Vietnamese Dong", "code": "VND"},
+        "BDT": {"symbol": "৳", "name": "Bangladeshi Taka", "code": "BDT"},
+        "PKR": {"symbol": "₨", "name": "Pakistani Rupee", "code": "PKR"},
+        "LKR": {"symbol": "Rs", "name": "Sri Lankan Rupee", "code": "LKR"},
+        "NPR": {"symbol": "Rs", "name": "Nepalese Rupee", "code": "NPR"},
+        "EGP": {"symbol": "£", "name": "Egyptian Pound", "code": "EGP"},
+        "NGN": {"symbol": "₦", "name": "Nigerian Naira", "code": "NGN"},
+        "KES": {"symbol": "Sh", "name": "Kenyan Shilling", "code": "KES"},
+        "GHS": {"symbol": "₵", "name": "Ghanaian Cedi", "code": "GHS"},
+        "TRY": {"symbol": "₺", "name": "Turkish Lira", "code": "TRY"},
+        "ILS": {"symbol": "₪", "name": "Israeli Shekel", "code": "ILS"},
+        "NOK": {"symbol": "kr", "name": "Norwegian Krone", "code": "NOK"},
+        "SEK": {"symbol": "kr", "name": "Swedish Krona", "code": "SEK"},
+        "DKK": {"symbol": "kr", "name": "Danish Krone", "code": "DKK"},
+        "CZK": {"symbol": "Kč", "name": "Czech Koruna", "code": "CZK"},
+        "PLN": {"symbol": "zł", "name": "Polish Zloty", "code": "PLN"},
+        "HUF": {"symbol": "Ft", "name": "Hungarian Forint", "code": "HUF"},
+        "RON": {"symbol": "L", "name": "Romanian Leu", "code": "RON"},
+        "BGN": {"symbol": "лв", "name": "Bulgarian Lev", "code": "BGN"},
+        "HRK": {"symbol": "kn", "name": "Croatian Kuna", "code": "HRK"},
+        "ISK": {"symbol": "kr", "name": "Icelandic Krona", "code": "ISK"},
+        "NZD": {"symbol": "NZ$", "name": "New Zealand Dollar", "code": "NZD"},
+        "CLP": {"symbol": "CLP$", "name": "Chilean Peso", "code": "CLP"},
+        "COP": {"symbol": "COL$", "name": "Colombian Peso", "code": "COP"},
+        "ARS": {"symbol": "AR$", "name": "Argentine Peso", "code": "ARS"},
+        "PEN": {"symbol": "S/", "name": "Peruvian Sol", "code": "PEN"},
+        "UYU": {"symbol": "UY$", "name": "Uruguayan Peso", "code": "UYU"},
+        "BOB": {"symbol": "Bs", "name": "Bolivian Boliviano", "code": "BOB"},
+        "ETB": {"symbol": "Br", "name": "Ethiopian Birr", "code": "ETB"},
+        "MAD": {"symbol": "د.م.", "name": "Moroccan Dirham", "code": "MAD"},
+        "TND": {"symbol": "د.ت", "name": "Tunisian Dinar", "code": "TND"},
+        "DZD": {"symbol": "د.ج", "name": "Algerian Dinar", "code": "DZD"},
+        "LYD": {"symbol": "د.ل", "name": "Libyan Dinar", "code": "LYD"},
+        "JOD": {"symbol": "د.ا", "name": "Jordanian Dinar", "code": "JOD"},
+        "KWD": {"symbol": "د.ك", "name": "Kuwaiti Dinar", "code": "KWD"},
+        "QAR": {"symbol": "ر.ق", "name": "Qatari Riyal", "code": "QAR"},
+        "BHD": {"symbol": "ب.د", "name": "Bahraini Dinar", "code": "BHD"},
+        "OMR": {"symbol": "ر.ع.", "name": "Omani Rial", "code": "OMR"},
+        "LBP": {"symbol": "ل.ل", "name": "Lebanese Pound", "code": "LBP"},
+        "IQD": {"symbol": "ع.د", "name": "Iraqi Dinar", "code": "IQD"},
+        "IRR": {"symbol": "﷼", "name": "Iranian Rial", "code": "IRR"},
+        "AFN": {"symbol": "؋", "name": "Afghan Afghani", "code": "AFN"},
+        "UZS": {"symbol": "лв", "name": "Uzbekistani Som", "code": "UZS"},
+        "KZT": {"symbol": "₸", "name": "Kazakhstani Tenge", "code": "KZT"},
+        "KGS": {"symbol": "лв", "name": "Kyrgyzstani Som", "code": "KGS"},
+        "TJS": {"symbol": "ЅМ", "name": "Tajikistani Somoni", "code": "TJS"},
+        "TMT": {"symbol": "T", "name": "Turkmenistani Manat", "code": "TMT"},
+        "AZN": {"symbol": "₼", "name": "Azerbaijani Manat", "code": "AZN"},
+        "GEL": {"symbol": "₾", "name": "Georgian Lari", "code": "GEL"},
+        "AMD": {"symbol": "֏", "name": "Armenian Dram", "code": "AMD"},
+        "BWP": {"symbol": "P", "name": "Botswanan Pula", "code": "BWP"},
+        "NAD": {"symbol": "N$", "name": "Namibian Dollar", "code": "NAD"},
+        "SZL": {"symbol": "E", "name": "Swazi Lilangeni", "code": "SZL"},
+        "LSL": {"symbol": "L", "name": "Lesotho Loti", "code": "LSL"},
+        "MWK": {"symbol": "MK", "name": "Malawian Kwacha", "code": "MWK"},
+        "ZMW": {"symbol": "ZK", "name": "Zambian Kwacha", "code": "ZMW"},
+        "ZWL": {"symbol": "Z$", "name": "Zimbabwean Dollar", "code": "ZWL"},
+        "MZN": {"symbol": "MT", "name": "Mozambican Metical", "code": "MZN"},
+        "AOA": {"symbol": "Kz", "name": "Angolan Kwanza", "code": "AOA"},
+        "XAF": {"symbol": "CFA", "name": "Central African CFA Franc", "code": "XAF"},
+        "XOF": {"symbol": "CFA", "name": "West African CFA Franc", "code": "XOF"},
+        "BTC": {"symbol": "₿", "name": "Bitcoin", "code": "BTC"},
+        "ETH": {"symbol": "Ξ", "name": "Ethereum", "code": "ETH"},
+    }
+    # Digits after the decimal point, where it is not 2
+    DECIMALS = {
+        "JPY": 0, "KRW": 0, "VND": 0, "CLP": 0, "ISK": 0, "XAF": 0, "XOF": 0,
+        "KWD": 3, "BHD": 3, "OMR": 3, "JOD": 3, "TND": 3, "LYD": 3, "IQD": 3,
+        "BTC": 8, "ETH": 8,
+    }
+    # Written as "1,234.50 kr" rather than with the symbol in front
+    SYMBOL_AFTER = {"SEK", "NOK", "DKK", "ISK", "CZK", "PLN", "HUF", "RON", "BGN", "VND"}
+    # Grouped in lakhs and crores: 12,34,567.00
+    INDIAN_GROUPING = {"INR", "NPR", "PKR", "BDT"}
+    
+    @classmethod
+    def get_symbol(cls, code: str) -> str:
+        return cls.CURRENCIES.get(code, {}).get("symbol", "$")
+    
+    @classmethod
+    def get_name(cls, code: str) -> str:
+        return cls.CURRENCIES.get(code, {}).get("name", "Unknown")
+    
+    @classmethod
+    def get_display_text(cls, code: str) -> str:
+        currency = cls.CURRENCIES.get(code, {})
+        return f"{currency.get('symbol', '$')} {currency.get('name', 'Unknown')} ({code})"
+
+class Transaction:
+    """Represents a financial transaction"""
+    
+    __slots__ = ('id', 'amount', 'description', 'transaction_type', 'category', 'date', 'created_at', 'currency')
+    
+    def __init__(self, amount: float, description: str, transaction_type: TransactionType, 
+                 category: str, date: Optional[datetime] = None, currency: Optional[str] = None):
+        self.id = self.new_id()
+        self.amount = abs(float(amount))
+        self.description = description.strip()
+        self.transaction_type = transaction_type
+        self.category = category
+        self.date = date or datetime.now()
+        self.created_at = datetime.now()
+        # Currency code of amount; None for rows saved before transactions had one
+        self.currency = currency
+    
+    @staticmethod
+    def new_id() -> str:
+        # Same as the first 8 hex digits of a uuid4, without the slow uuid import
+        return os.urandom(4).hex()
+    
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'amount': self.amount,
+            'description': self.description,
+            'transaction_type': self.transaction_type.value,
+            'category': self.category,
+            'date': self.date.isoformat(),
+            'created_at': self.created_at.isoformat(),
+            'currency': self.currency
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Transaction':
+        transaction = cls(
+            amount=data['amount'],
+            description=data['description'],
+            transaction_type=TransactionType(data['transaction_type']),
+            category=data['category'],
+            date=datetime.fromisoformat(data['date']),
+            currency=data.get('currency')
+        )
+        transaction.id = data['id']
+        transaction.created_at = datetime.fromisoformat(data['created_at'])
+        return transaction
+
+# Built-in categories as (emoji, name) pairs
+INCOME_CATEGORIES = [
+    ("💼", "Salary"),
+    ("💻", "Freelance"),
+    ("📈", "Investment"),
+    ("🎁", "Gift"),
+    ("💰", "Business"),
+    ("🏠", "Rental"),
+    ("🔄", "Refund"),
+    ("💳", "Bonus"),
+    ("🏆", "Prize"),
+    ("💸", "Cashback"),
+    ("📦", "Other Income")
+]
+
+EXPENSE_CATEGORIES = [
+    ("🍔", "Food & Dining"),
+    ("🚗", "Transportation"),
+    ("🏠", "Housing"),
+    ("⚡", "Utilities"),
+    ("🏥", "Healthcare"),
+    ("🎬", "Entertainment"),
+    ("🛒", "Shopping"),
+    ("📚", "Education"),
+    ("💳", "Bills"),
+    ("👕", "Clothing"),
+    ("✈️", "Travel"),
+    ("🎮", "Hobbies"),
+    ("💊", "Medicine"),
+    ("🔧", "Maintenance"),
+    ("📱", "Technology"),
+    ("🎵", "Subscriptions"),
+    ("🚖", "Taxi/Uber"),
+    ("⛽", "Fuel"),
+    ("🏋️", "Gym/Sports"),
+    ("💄", "Beauty"),
+    ("🎪", "Events"),
+    ("🎨", "Arts & Crafts"),
+    ("📦", "Other Expense")
+]
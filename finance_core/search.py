@@ -0,0 +1,107 @@
+"""Inverted word index over transaction descriptions and categories"""
+import re
+from bisect import bisect_left, insort
+from typing import List, Dict, Optional, Iterable, Set, Callable
+
+from .models import Transaction
+
+class SearchIndex:
+    """Maps each word of a description or category to the ids of the transactions using it
+
+    The vocabulary is kept sorted, so a query word matches every indexed word
+    it is a prefix of with one bisect; that keeps as-you-type search cheap.
+    lookup(id), when given, returns the indexed transaction; it lets a query
+    check a short list of matches against a broad prefix such as "s" instead
+    of collecting every id under that prefix.
+    """
+
+    WORD = re.compile(r"\w+")
+    # A term matching this many times more ids than the current result is checked row by row
+    VERIFY_RATIO = 4
+
+    def __init__(self, transactions: Iterable[Transaction] = (),
+                 lookup: Optional[Callable[[str], Optional[Transaction]]] = None):
+        self.postings: Dict[str, Set[str]] = {}
+        self.words: List[str] = []
+        self.lookup = lookup
+        self.add_many(transactions)
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Lower-cased words of text; punctuation and emoji only separate words"""
+        return cls.WORD.findall(text.casefold())
+
+    def _words_of(self, transaction: Transaction) -> Set[str]:
+        return set(self.tokenize(f"{transaction.description} {transaction.category}"))
+
+    def add(self, transaction: Transaction):
+        for word in self._words_of(transaction):
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                insort(self.words, word)
+            ids.add(transaction.id)
+
+    def add_many(self, transactions: Iterable[Transaction]):
+        """Index a batch, sorting the vocabulary once at the end"""
+        postings = self.postings
+        count = len(postings)
+        for transaction in transactions:
+            transaction_id = transaction.id
+            for word in self._words_of(transaction):
+                ids = postings.get(word)
+                if ids is None:
+                    ids = postings[word] = set()
+                ids.add(transaction_id)
+        if len(postings) != count:
+            self.words = sorted(postings)
+
+    def remove(self, transaction: Transaction):
+        for word in self._words_of(transaction):
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(transaction.id)
+            if not ids:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+
+    def remove_many(self, transactions: Iterable[Transaction]):
+        for transaction in transactions:
+            self.remove(transaction)
+
+    def _prefix_words(self, prefix: str) -> List[str]:
+        words = self.words
+        first = position = bisect_left(words, prefix)
+        while position < len(words) and words[position].startswith(prefix):
+            position += 1
+        return words[first:position]
+
+    def prefix_matches(self, prefix: str) -> Set[str]:
+        """Ids of transactions with a word starting with prefix"""
+        words = self._prefix_words(prefix)
+        if len(words) == 1:
+            return self.postings[words[0]]  # A single word needs no copy
+        return set().union(*map(self.postings.__getitem__, words))
+
+    def search(self, text: str) -> Optional[Set[str]]:
+        """Ids of transactions matching every word of text as a prefix; None when text has no words
+
+        The returned set may be shared with the index, so callers must not modify it.
+        """
+        terms = set(self.tokenize(text))
+        if not terms:
+            return None
+        # Upper bounds on each term's matches; the most selective term goes first
+        sizes = {term: sum(len(self.postings[word]) for word in self._prefix_words(term)) for term in terms}
+        terms = sorted(terms, key=sizes.__getitem__)
+        result = self.prefix_matches(terms[0])
+        for term in terms[1:]:
+            if not result:
+                break
+            if self.lookup is not None and sizes[term] > len(result) * self.VERIFY_RATIO:
+                result = {i for i in result
+                          if any(word.startswith(term) for word in self._words_of(self.lookup(i)))}
+            else:
+                result = result & self.prefix_matches(term)
+        return result
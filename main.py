@@ -1,13 +1,16 @@
-import json
-import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from enum import Enum
-import uuid
+import time
+
+# Taken before the Kivy imports so the startup report includes them
+STARTED = time.perf_counter()
+
+from datetime import date, datetime, timedelta
+from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+
+from finance_core import ChangeEvent, Currency, DataHandler, TransactionType
 
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
-from kivymd.uix.screenmanager import MDScreenManager
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivymd.uix.gridlayout import MDGridLayout
@@ -15,332 +18,150 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDRaisedButton, MDIconButton, MDFlatButton
 from kivymd.uix.textfield import MDTextField
-from kivymd.uix.selectioncontrol import MDCheckbox
 
-from kivymd.uix.list import MDList, OneLineListItem, ThreeLineListItem, OneLineIconListItem, TwoLineIconListItem
+from kivymd.uix.list import MDList, OneLineListItem, ThreeLineListItem, TwoLineIconListItem
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.menu import MDDropdownMenu
-from kivymd.uix.bottomnavigation import MDBottomNavigation, MDBottomNavigationItem
-from kivymd.uix.toolbar import MDTopAppBar
-from kivymd.uix.navigationdrawer import MDNavigationDrawer
 from kivymd.uix.snackbar import Snackbar
-from kivymd.uix.button import MDFloatingActionButton
 from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.chip import MDChip
-from kivymd.uix.datatables import MDDataTable
-from kivymd.icon_definitions import md_icons
-from kivymd.uix.pickers import MDDatePicker
 from kivymd.uix.progressbar import MDProgressBar
-from kivymd.uix.relativelayout import MDRelativeLayout
 
 from kivy.metrics import dp
 from kivy.clock import Clock
 from kivy.utils import get_color_from_hex
 from kivy.animation import Animation
-from kivy.uix.widget import Widget
-
-class TransactionType(Enum):
-    INCOME = "income"
-    EXPENSE = "expense"
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.properties import ObjectProperty
 
-class Currency:
-    """Currency information"""
+class QueryWorker:
+    """Runs data queries off the UI thread and posts results back through the Kivy clock
     
-    CURRENCIES = {
-        "INR": {"symbol": "₹", "name": "Indian Rupee", "code": "INR"},
-        "USD": {"symbol": "$", "name": "US Dollar", "code": "USD"},
-        "EUR": {"symbol": "€", "name": "Euro", "code": "EUR"},
-        "GBP": {"symbol": "£", "name": "British Pound", "code": "GBP"},
-        "JPY": {"symbol": "¥", "name": "Japanese Yen", "code": "JPY"},
-        "AUD": {"symbol": "A$", "name": "Australian Dollar", "code": "AUD"},
-        "CAD": {"symbol": "C$", "name": "Canadian Dollar", "code": "CAD"},
-        "CHF": {"symbol": "Fr", "name": "Swiss Franc", "code": "CHF"},
-        "CNY": {"symbol": "¥", "name": "Chinese Yuan", "code": "CNY"},
-        "KRW": {"symbol": "₩", "name": "South Korean Won", "code": "KRW"},
-        "SGD": {"symbol": "S$", "name": "Singapore Dollar", "code": "SGD"},
-        "HKD": {"symbol": "HK$", "name": "Hong Kong Dollar", "code": "HKD"},
-        "MXN": {"symbol": "MX$", "name": "Mexican Peso", "code": "MXN"},
-        "BRL": {"symbol": "R$", "name": "Brazilian Real", "code": "BRL"},
-        "RUB": {"symbol": "₽", "name": "Russian Ruble", "code": "RUB"},
-        "SAR": {"symbol": "ر.س", "name": "Saudi Riyal", "code": "SAR"},
-        "AED": {"symbol": "د.إ", "name": "UAE Dirham", "code": "AED"},
-        "ZAR": {"symbol": "R", "name": "South African Rand", "code": "ZAR"},
-        "THB": {"symbol": "฿", "name": "Thai Baht", "code": "THB"},
-        "IDR": {"symbol": "Rp", "name": "Indonesian Rupiah", "code": "IDR"},
-        "MYR": {"symbol": "RM", "name": "Malaysian Ringgit", "code": "MYR"},
-        "PHP": {"symbol": "₱", "name": "Philippine Peso", "code": "PHP"},
-        "VND": {"symbol": "₫", "name": "Vietnamese Dong", "code": "VND"},
-        "BDT": {"symbol": "৳", "name": "Bangladeshi Taka", "code": "BDT"},
-        "PKR": {"symbol": "₨", "name": "Pakistani Rupee", "code": "PKR"},
-        "LKR": {"symbol": "Rs", "name": "Sri Lankan Rupee", "code": "LKR"},
-        "NPR": {"symbol": "Rs", "name": "Nepalese Rupee", "code": "NPR"},
-        "EGP": {"symbol": "£", "name": "Egyptian Pound", "code": "EGP"},
-        "NGN": {"symbol": "₦", "name": "Nigerian Naira", "code": "NGN"},
-        "KES": {"symbol": "Sh", "name": "Kenyan Shilling", "code": "KES"},
-        "GHS": {"symbol": "₵", "name": "Ghanaian Cedi", "code": "GHS"},
-        "TRY": {"symbol": "₺", "name": "Turkish Lira", "code": "TRY"},
-        "ILS": {"symbol": "₪", "name": "Israeli Shekel", "code": "ILS"},
-        "NOK": {"symbol": "kr", "name": "Norwegian Krone", "code": "NOK"},
-        "SEK": {"symbol": "kr", "name": "Swedish Krona", "code": "SEK"},
-        "DKK": {"symbol": "kr", "name": "Danish Krone", "code": "DKK"},
-        "CZK": {"symbol": "Kč", "name": "Czech Koruna", "code": "CZK"},
-        "PLN": {"symbol": "zł", "name": "Polish Zloty", "code": "PLN"},
-        "HUF": {"symbol": "Ft", "name": "Hungarian Forint", "code": "HUF"},
-        "RON": {"symbol": "L", "name": "Romanian Leu", "code": "RON"},
-        "BGN": {"symbol": "лв", "name": "Bulgarian Lev", "code": "BGN"},
-        "HRK": {"symbol": "kn", "name": "Croatian Kuna", "code": "HRK"},
-        "ISK": {"symbol": "kr", "name": "Icelandic Krona", "code": "ISK"},
-        "NZD": {"symbol": "NZ$", "name": "New Zealand Dollar", "code": "NZD"},
-        "CLP": {"symbol": "CLP$", "name": "Chilean Peso", "code": "CLP"},
-        "COP": {"symbol": "COL$", "name": "Colombian Peso", "code": "COP"},
-        "ARS": {"symbol": "AR$", "name": "Argentine Peso", "code": "ARS"},
-        "PEN": {"symbol": "S/", "name": "Peruvian Sol", "code": "PEN"},
-        "UYU": {"symbol": "UY$", "name": "Uruguayan Peso", "code": "UYU"},
-        "BOB": {"symbol": "Bs", "name": "Bolivian Boliviano", "code": "BOB"},
-        "ETB": {"symbol": "Br", "name": "Ethiopian Birr", "code": "ETB"},
-        "MAD": {"symbol": "د.م.", "name": "Moroccan Dirham", "code": "MAD"},
-        "TND": {"symbol": "د.ت", "name": "Tunisian Dinar", "code": "TND"},
-        "DZD": {"symbol": "د.ج", "name": "Algerian Dinar", "code": "DZD"},
-        "LYD": {"symbol": "د.ل", "name": "Libyan Dinar", "code": "LYD"},
-        "JOD": {"symbol": "د.ا", "name": "Jordanian Dinar", "code": "JOD"},
-        "KWD": {"symbol": "د.ك", "name": "Kuwaiti Dinar", "code": "KWD"},
-        "QAR": {"symbol": "ر.ق", "name": "Qatari Riyal", "code": "QAR"},
-        "BHD": {"symbol": "ب.د", "name": "Bahraini Dinar", "code": "BHD"},
-        "OMR": {"symbol": "ر.ع.", "name": "Omani Rial", "code": "OMR"},
-        "LBP": {"symbol": "ل.ل", "name": "Lebanese Pound", "code": "LBP"},
-        "IQD": {"symbol": "ع.د", "name": "Iraqi Dinar", "code": "IQD"},
-        "IRR": {"symbol": "﷼", "name": "Iranian Rial", "code": "IRR"},
-        "AFN": {"symbol": "؋", "name": "Afghan Afghani", "code": "AFN"},
-        "UZS": {"symbol": "лв", "name": "Uzbekistani Som", "code": "UZS"},
-        "KZT": {"symbol": "₸", "name": "Kazakhstani Tenge", "code": "KZT"},
-        "KGS": {"symbol": "лв", "name": "Kyrgyzstani Som", "code": "KGS"},
-        "TJS": {"symbol": "ЅМ", "name": "Tajikistani Somoni", "code": "TJS"},
-        "TMT": {"symbol": "T", "name": "Turkmenistani Manat", "code": "TMT"},
-        "AZN": {"symbol": "₼", "name": "Azerbaijani Manat", "code": "AZN"},
-        "GEL": {"symbol": "₾", "name": "Georgian Lari", "code": "GEL"},
-        "AMD": {"symbol": "֏", "name": "Armenian Dram", "code": "AMD"},
-        "BWP": {"symbol": "P", "name": "Botswanan Pula", "code": "BWP"},
-        "NAD": {"symbol": "N$", "name": "Namibian Dollar", "code": "NAD"},
-        "SZL": {"symbol": "E", "name": "Swazi Lilangeni", "code": "SZL"},
-        "LSL": {"symbol": "L", "name": "Lesotho Loti", "code": "LSL"},
-        "MWK": {"symbol": "MK", "name": "Malawian Kwacha", "code": "MWK"},
-        "ZMW": {"symbol": "ZK", "name": "Zambian Kwacha", "code": "ZMW"},
-        "ZWL": {"symbol": "Z$", "name": "Zimbabwean Dollar", "code": "ZWL"},
-        "MZN": {"symbol": "MT", "name": "Mozambican Metical", "code": "MZN"},
-        "AOA": {"symbol": "Kz", "name": "Angolan Kwanza", "code": "AOA"},
-        "XAF": {"symbol": "CFA", "name": "Central African CFA Franc", "code": "XAF"},
-        "XOF": {"symbol": "CFA", "name": "West African CFA Franc", "code": "XOF"},
-        "BTC": {"symbol": "₿", "name": "Bitcoin", "code": "BTC"},
-        "ETH": {"symbol": "Ξ", "name": "Ethereum", "code": "ETH"},
-    }
+    Each request has a key; a newer request with the same key supersedes the
+    older one, whose result is dropped (or never computed, if still queued).
+    """
     
-    @classmethod
-    def get_symbol(cls, code: str) -> str:
-        return cls.CURRENCIES.get(code, {}).get("symbol", "$")
+    def __init__(self, max_workers: int = 1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._generations: Dict[str, int] = {}
+        self._futures = {}
     
-    @classmethod
-    def get_name(cls, code: str) -> str:
-        return cls.CURRENCIES.get(code, {}).get("name", "Unknown")
-    
-    @classmethod
-    def get_display_text(cls, code: str) -> str:
-        currency = cls.CURRENCIES.get(code, {})
-        return f"{currency.get('symbol', '$')} {currency.get('name', 'Unknown')} ({code})"
-
-    def on_period_chip_selected(self, selected_chip, days):
+    def submit(self, key: str, compute, on_result):
+        """Run compute() in the background and call on_result(result) on the UI thread"""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        previous = self._futures.get(key)
+        if previous is not None:
+            previous.cancel()
+        future = self.executor.submit(compute)
+        self._futures[key] = future
+        
+        def done(finished):
+            if not finished.cancelled():
+                Clock.schedule_once(lambda dt: self._deliver(key, generation, finished, on_result))
+        
+        future.add_done_callback(done)
     
-        self.current_period = days
-
-        for chip in selected_chip.parent.children:
-            chip.md_bg_color = (0.9, 0.9, 0.9, 1)
-        selected_chip.md_bg_color = (0.3, 0.7, 0.6, 1)
-
-        self.update_stats()
-
-
-class Transaction:
-    """Represents a financial transaction"""
+    def is_pending(self, key: str) -> bool:
+        return key in self._futures
     
-    def __init__(self, amount: float, description: str, transaction_type: TransactionType, 
-                 category: str, date: Optional[datetime] = None):
-        self.id = str(uuid.uuid4())[:8]
-        self.amount = abs(float(amount))
-        self.description = description.strip()
-        self.transaction_type = transaction_type
-        self.category = category
-        self.date = date or datetime.now()
-        self.created_at = datetime.now()
+    def _deliver(self, key, generation, future, on_result):
+        if self._generations.get(key) != generation:
+            return  # Superseded by a newer request
+        del self._futures[key]
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error running {key} query: {e}")
+            return
+        on_result(result)
     
-    def to_dict(self) -> Dict:
-        return {
-            'id': self.id,
-            'amount': self.amount,
-            'description': self.description,
-            'transaction_type': self.transaction_type.value,
-            'category': self.category,
-            'date': self.date.isoformat(),
-            'created_at': self.created_at.isoformat()
-        }
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class StartupTimer:
+    """Times the phases of app startup and prints a report once the first frame is drawn"""
     
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'Transaction':
-        transaction = cls(
-            amount=data['amount'],
-            description=data['description'],
-            transaction_type=TransactionType(data['transaction_type']),
-            category=data['category'],
-            date=datetime.fromisoformat(data['date'])
-        )
-        transaction.id = data['id']
-        transaction.created_at = datetime.fromisoformat(data['created_at'])
-        return transaction
-
-class FinanceData:
-    """Data management class"""
+    def __init__(self, started: float):
+        self.started = self.last = started
+        self.phases = []
     
-    INCOME_CATEGORIES = [
-        ("💼", "Salary"),
-        ("💻", "Freelance"),
-        ("📈", "Investment"),
-        ("🎁", "Gift"),
-        ("💰", "Business"),
-        ("🏠", "Rental"),
-        ("🔄", "Refund"),
-        ("💳", "Bonus"),
-        ("🏆", "Prize"),
-        ("💸", "Cashback"),
-        ("📦", "Other Income")
-    ]
+    def mark(self, phase: str):
+        """End the current phase and name it"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
     
-    EXPENSE_CATEGORIES = [
-        ("🍔", "Food & Dining"),
-        ("🚗", "Transportation"),
-        ("🏠", "Housing"),
-        ("⚡", "Utilities"),
-        ("🏥", "Healthcare"),
-        ("🎬", "Entertainment"),
-        ("🛒", "Shopping"),
-        ("📚", "Education"),
-        ("💳", "Bills"),
-        ("👕", "Clothing"),
-        ("✈️", "Travel"),
-        ("🎮", "Hobbies"),
-        ("💊", "Medicine"),
-        ("🔧", "Maintenance"),
-        ("📱", "Technology"),
-        ("🎵", "Subscriptions"),
-        ("🚖", "Taxi/Uber"),
-        ("⛽", "Fuel"),
-        ("🏋️", "Gym/Sports"),
-        ("💄", "Beauty"),
-        ("🎪", "Events"),
-        ("🎨", "Arts & Crafts"),
-        ("📦", "Other Expense")
-    ]
+    def report(self):
+        lines = [f"   {phase:<20}{seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"   {'total':<20}{(self.last - self.started) * 1000:8.1f} ms")
+        print("⏱️ Startup timing\n" + "\n".join(lines))
+
+class LazyScreen(MDScreen):
+    """Screen whose widgets are built the first time it is shown, not at app startup"""
     
-    def __init__(self, data_file="finance_data.json"):
-        self.data_file = data_file
-        self.transactions: List[Transaction] = []
-        self.currency_code = "USD"  # Default currency
-        self.load_data()
+    built = False
     
-    def load_data(self):
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.transactions = [Transaction.from_dict(t) for t in data.get('transactions', [])]
-                    self.currency_code = data.get('currency_code', 'USD')
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            self.transactions = []
-            self.currency_code = "USD"
+    def on_pre_enter(self, *args):
+        if not self.built:
+            start = time.perf_counter()
+            self.build_ui()
+            self.built = True
+            print(f"⏱️ {self.name} screen built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+class DataScreen(LazyScreen):
+    """Lazy screen showing FinanceData that follows its change events
     
-    def save_data(self):
-        try:
-            data = {
-                'transactions': [t.to_dict() for t in self.transactions],
-                'currency_code': self.currency_code,
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving data: {e}")
+    Events are collected and handled once per frame. view_key() names what
+    the widgets show; refresh() runs when the screen is entered, or changes
+    arrive while it is shown, only if the key differs from the one last shown.
+    """
     
-    def set_currency(self, currency_code: str):
-        self.currency_code = currency_code
-        self.save_data()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.data = None
+        self.worker = None
+        # Change events received since they were last handled
+        self.pending_changes = []
+        self.changes_trigger = Clock.create_trigger(self.apply_pending_changes)
+        # view_key() as of the last refresh; None until first shown
+        self.shown_key = None
     
-    def get_currency_symbol(self) -> str:
-        return Currency.get_symbol(self.currency_code)
+    def on_data_changed(self, events):
+        """FinanceData listener; may be called on the worker thread"""
+        self.pending_changes.extend(events)
+        self.changes_trigger()
     
-    def format_amount(self, amount: float) -> str:
-        symbol = self.get_currency_symbol()
-        return f"{symbol}{amount:,.2f}"
+    def apply_pending_changes(self, dt=None):
+        events, self.pending_changes = self.pending_changes, []
+        if events and self.built:
+            self.on_changes(events)
     
-    def add_transaction(self, amount: float, description: str, 
-                       transaction_type: TransactionType, category: str,
-                       date: Optional[datetime] = None) -> bool:
-        try:
-            if amount <= 0 or not description.strip():
-                return False
-            
-            transaction = Transaction(amount, description, transaction_type, category, date)
-            self.transactions.insert(0, transaction)  # Add to beginning for recent first
-            self.save_data()
-            return True
-        except Exception:
-            return False
+    def is_shown(self) -> bool:
+        return self.manager is not None and self.manager.current == self.name
     
-    def delete_transaction(self, transaction_id: str) -> bool:
-        try:
-            self.transactions = [t for t in self.transactions if t.id != transaction_id]
-            self.save_data()
-            return True
-        except Exception:
-            return False
+    def on_changes(self, events):
+        # Hidden screens catch up when next entered
+        if self.is_shown():
+            self.refresh_if_stale()
     
-    def get_balance(self) -> float:
-        income = sum(t.amount for t in self.transactions if t.transaction_type == TransactionType.INCOME)
-        expenses = sum(t.amount for t in self.transactions if t.transaction_type == TransactionType.EXPENSE)
-        return income - expenses
+    def view_key(self):
+        # Stats cover the days up to today, so they also go stale at midnight
+        return (self.data.version, date.today())
     
-    def get_period_stats(self, days: int = 30) -> Dict:
-        cutoff = datetime.now() - timedelta(days=days)
-        recent = [t for t in self.transactions if t.date >= cutoff]
-        
-        income = sum(t.amount for t in recent if t.transaction_type == TransactionType.INCOME)
-        expenses = sum(t.amount for t in recent if t.transaction_type == TransactionType.EXPENSE)
-        
-        return {
-            'income': income,
-            'expenses': expenses,
-            'balance': income - expenses,
-            'count': len(recent)
-        }
+    def refresh_if_stale(self):
+        if self.data and self.view_key() != self.shown_key:
+            self.refresh()
     
-    def get_category_stats(self, transaction_type: TransactionType, days: int = 30) -> Dict:
-        cutoff = datetime.now() - timedelta(days=days)
-        recent = [t for t in self.transactions 
-                 if t.date >= cutoff and t.transaction_type == transaction_type]
-        
-        category_totals = {}
-        for transaction in recent:
-            category = transaction.category
-            if category not in category_totals:
-                category_totals[category] = 0
-            category_totals[category] += transaction.amount
-        
-        return category_totals
-class DataHandler(FinanceData):
-    def __init__(self):
-        super().__init__()
-        print("✅ DataHandler initialized with FinanceData features")
-
-    def process_data(self):
-        print("⚙️ Custom processing")
+    def refresh(self):
+        """Redraw the screen from self.data; a no-op for screens that do not override it"""
     
+    def on_enter(self, *args):
+        """Called when screen is entered"""
+        if self.data:
+            self.apply_pending_changes()
+            self.refresh_if_stale()
 
 class AnimatedCard(MDCard):
     """Custom animated card with hover effects"""
@@ -365,13 +186,16 @@ class AnimatedCard(MDCard):
             anim.start(self)
         return super().on_touch_up(touch)
 
-class DashboardScreen(MDScreen):
+class DashboardScreen(DataScreen):
     """Enhanced dashboard screen with better animations"""
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.data = None
-        self.build_ui()
+        # Menus and dialogs are built on first use and reused after that
+        self.currency_menu = None
+        self.all_currencies_dialog = None
+        self.add_dialog = None
+        self.category_menus = {}
     
     def build_ui(self):
         # Main scrollable layout
@@ -619,8 +443,10 @@ class DashboardScreen(MDScreen):
         recent_header.add_widget(recent_label)
         recent_header.add_widget(view_all_btn)
         
-        # Recent Transactions List
+        # Recent Transactions List, with its rows by transaction id
         self.recent_list = MDList()
+        self.recent_items = {}
+        self.no_data_item = None
         recent_card = MDCard(
             elevation=4,
             radius=[10],
@@ -643,6 +469,10 @@ class DashboardScreen(MDScreen):
     
     def open_currency_menu(self, instance):
         """Open currency selection menu"""
+        if self.currency_menu is not None:
+            self.currency_menu.open()
+            return
+        
         menu_items = []
         
         # Popular currencies first
@@ -681,6 +511,9 @@ class DashboardScreen(MDScreen):
     def show_all_currencies(self):
         """Show all available currencies in a dialog"""
         self.currency_menu.dismiss()
+        if self.all_currencies_dialog is not None:
+            self.all_currencies_dialog.open()
+            return
         
         # Create a dialog with all currencies
         content = MDBoxLayout(
@@ -723,9 +556,8 @@ class DashboardScreen(MDScreen):
     def select_currency(self, currency_code):
         """Select a currency and update the display"""
         if self.data:
+            # The dashboard is refreshed by the change event
             self.data.set_currency(currency_code)
-            self.update_currency_display()
-            self.update_dashboard()
             self.currency_menu.dismiss()
 
     def update_currency_display(self):
@@ -744,97 +576,15 @@ class DashboardScreen(MDScreen):
         """Quick add expense dialog"""
         self.show_add_transaction_dialog(TransactionType.EXPENSE)
 
-    def show_add_transaction_dialog(self, transaction_type):
-   
-
-    # Create content layout
-        content_layout = MDBoxLayout(
-            orientation="vertical",
-            spacing=dp(15),
-            padding=dp(10),
-            size_hint_y=None
-        )
-        content_layout.bind(minimum_height=content_layout.setter("height"))
-
-        # Amount Field
-        self.amount_field = MDTextField(
-            hint_text="Amount",
-            helper_text="Enter amount",
-            helper_text_mode="on_focus",
-            icon_right="currency-usd",
-            size_hint_y=None,
-            height=dp(60)
-        )
-
-        # Description Field
-        self.description_field = MDTextField(
-            hint_text="Description",
-            helper_text="Enter description",
-            helper_text_mode="on_focus",
-            icon_right="text",
-            size_hint_y=None,
-            height=dp(60)
-        )
-
-        # Category
-        categories = (self.data.INCOME_CATEGORIES if transaction_type == TransactionType.INCOME 
-                    else self.data.EXPENSE_CATEGORIES)
-
-        category_layout = MDBoxLayout(orientation="horizontal", spacing=dp(10), size_hint_y=None, height=dp(40))
-        category_label = MDLabel(text="Category:", size_hint_x=0.3, theme_text_color="Primary")
-
-        self.category_button = MDRaisedButton(
-            text=f"{categories[0][0]} {categories[0][1]}",
-            size_hint_x=0.7,
-            on_release=lambda x: self.open_category_menu(categories, transaction_type)
-        )
-        category_layout.add_widget(category_label)
-        category_layout.add_widget(self.category_button)
-
-        # Date
-        date_layout = MDBoxLayout(orientation="horizontal", spacing=dp(10), size_hint_y=None, height=dp(40))
-        date_label = MDLabel(text="Date:", size_hint_x=0.3, theme_text_color="Primary")
-        self.date_button = MDRaisedButton(
-            text=datetime.now().strftime("%Y-%m-%d"),
-            size_hint_x=0.7,
-            on_release=self.open_date_picker
-        )
-        date_layout.add_widget(date_label)
-        date_layout.add_widget(self.date_button)
-
-        # Add widgets to content
-        content_layout.add_widget(self.amount_field)
-        content_layout.add_widget(self.description_field)
-        content_layout.add_widget(category_layout)
-        content_layout.add_widget(date_layout)
-
-        # Wrap in ScrollView
-        scroll = MDScrollView()
-        scroll.add_widget(content_layout)
-
-        # Save selection state
-        self.selected_category = categories[0][1]
-        self.selected_date = datetime.now()
-        self.current_transaction_type = transaction_type
-
-        # Dialog Title
-        title = "Add Income" if transaction_type == TransactionType.INCOME else "Add Expense"
-
-        # Create Dialog
-        self.add_dialog = MDDialog(
-            title=title,
-            content_cls=scroll,
-            type="custom",
-            buttons=[
-                MDFlatButton(text="CANCEL", on_release=lambda x: self.add_dialog.dismiss()),
-                MDRaisedButton(text="ADD", on_release=self.add_transaction)
-            ]
-        )
-        self.add_dialog.open()
-
-
     def open_category_menu(self, categories, transaction_type):
         """Open category selection menu"""
+        # Menus are rebuilt once user categories change
+        key = (transaction_type, self.data.categories.version)
+        if key in self.category_menus:
+            self.category_menu = self.category_menus[key]
+            self.category_menu.open()
+            return
+        
         menu_items = []
         for emoji, category in categories:
             menu_items.append({
@@ -848,6 +598,7 @@ class DashboardScreen(MDScreen):
             items=menu_items,
             width_mult=4,
         )
+        self.category_menus[key] = self.category_menu
         self.category_menu.open()
 
     def select_category(self, emoji, category):
@@ -858,6 +609,9 @@ class DashboardScreen(MDScreen):
 
     def open_date_picker(self, instance):
         """Open date picker"""
+        # The pickers module is large and rarely needed, so it is imported here
+        from kivymd.uix.pickers import MDDatePicker
+        
         date_dialog = MDDatePicker(
             year=datetime.now().year,
             month=datetime.now().month,
@@ -895,7 +649,6 @@ class DashboardScreen(MDScreen):
 
             if success:
                 self.add_dialog.dismiss()
-                self.update_dashboard()
                 Snackbar(text="Transaction added successfully!").open()
             else:
                 Snackbar(text="Failed to add transaction").open()
@@ -907,14 +660,38 @@ class DashboardScreen(MDScreen):
         """Navigate to transactions screen"""
         self.manager.current = "transactions"
 
+    def refresh(self):
+        self.update_currency_display()
+        self.update_dashboard()
+
     def update_dashboard(self):
-        """Update dashboard with current data"""
+        """Refresh the dashboard; the queries run on the worker when there is one"""
         if not self.data:
             return
 
+        data = self.data
+        # The queries see at least this version, so it is what will be shown
+        self.shown_key = self.view_key()
+
+        def compute():
+            return {
+                'balance': data.get_balance(),
+                'monthly': data.get_period_stats(30),
+                'recent': data.get_recent_transactions(5),
+                'unconverted': data.unconverted_currencies()
+            }
+
+        # Current values stay on screen until the new ones arrive
+        if self.worker:
+            self.worker.submit("dashboard", compute, self.show_dashboard)
+        else:
+            self.show_dashboard(compute())
+
+    def show_dashboard(self, result):
+        """Apply computed dashboard values to the widgets"""
         # Update balance
-        balance = self.data.get_balance()
-        self.balance_amount.text = f"{abs(balance):,.2f}"
+        balance = result['balance']
+        self.balance_amount.text = self.data.format_number(balance)
         
         # Update balance trend
         if balance > 0:
@@ -926,65 +703,79 @@ class DashboardScreen(MDScreen):
         else:
             self.balance_trend.text = "📉 Watch your spending!"
             self.balance_card.md_bg_color = get_color_from_hex("#e74c3c")
+        if result['unconverted']:
+            # Amounts without exchange rates are in the totals as entered
+            self.balance_trend.text = f"⚠️ {', '.join(result['unconverted'])} not converted"
 
         # Update monthly stats
-        monthly_stats = self.data.get_period_stats(30)
-        self.income_amount.text = f"{monthly_stats['income']:,.2f}"
-        self.expense_amount.text = f"{monthly_stats['expenses']:,.2f}"
+        monthly_stats = result['monthly']
+        self.income_amount.text = self.data.format_number(monthly_stats['income'])
+        self.expense_amount.text = self.data.format_number(monthly_stats['expenses'])
 
         # Update recent transactions
-        self.update_recent_transactions()
+        self.update_recent_transactions(result['recent'])
+
+    def update_recent_transactions(self, recent_transactions):
+        """Update recent transactions list, keeping the rows that are still shown"""
+        wanted = {t.id: t for t in recent_transactions}
+
+        # Drop rows that left the list or whose transaction changed
+        for transaction_id, (shown, item) in list(self.recent_items.items()):
+            current = wanted.get(transaction_id)
+            if current is None or (current is not shown and current.to_dict() != shown.to_dict()):
+                self.recent_list.remove_widget(item)
+                del self.recent_items[transaction_id]
 
-    def update_recent_transactions(self):
-        """Update recent transactions list"""
-        self.recent_list.clear_widgets()
-        
-        recent_transactions = self.data.transactions[:5]  # Show last 5 transactions
-        
         if not recent_transactions:
-            no_data_item = OneLineListItem(
-                text="No transactions yet",
-                theme_text_color="Hint"
-            )
-            self.recent_list.add_widget(no_data_item)
+            if self.no_data_item is None:
+                self.no_data_item = OneLineListItem(
+                    text="No transactions yet",
+                    theme_text_color="Hint"
+                )
+                self.recent_list.add_widget(self.no_data_item)
             return
+        if self.no_data_item is not None:
+            self.recent_list.remove_widget(self.no_data_item)
+            self.no_data_item = None
 
-        for transaction in recent_transactions:
-            # Get category emoji
-            categories = (self.data.INCOME_CATEGORIES if transaction.transaction_type == TransactionType.INCOME 
-                         else self.data.EXPENSE_CATEGORIES)
-            emoji = "💰"
-            for cat_emoji, cat_name in categories:
-                if cat_name == transaction.category:
-                    emoji = cat_emoji
-                    break
-
-            # Format amount with currency
-            amount_text = self.data.format_amount(transaction.amount)
-            if transaction.transaction_type == TransactionType.EXPENSE:
-                amount_text = f"-{amount_text}"
-            else:
-                amount_text = f"+{amount_text}"
+        # Kept rows are still in date order, so new ones only need inserting
+        for position, transaction in enumerate(recent_transactions):
+            if transaction.id in self.recent_items:
+                continue
+            emoji = self.data.categories.emoji(transaction.category)
+
+            # Signed amount in the transaction's currency, and its date
+            amount_text, date_text = self.data.display_strings(transaction)
 
             item = ThreeLineListItem(
                 text=f"{emoji} {transaction.description}",
-                secondary_text=f"{transaction.category} • {transaction.date.strftime('%Y-%m-%d')}",
+                secondary_text=f"{transaction.category} • {date_text}",
                 tertiary_text=amount_text,
                 on_release=lambda x, t=transaction: self.show_transaction_details(t)
             )
-            self.recent_list.add_widget(item)
+            # children runs bottom to top
+            self.recent_list.add_widget(item, index=len(self.recent_list.children) - position)
+            self.recent_items[transaction.id] = (transaction, item)
 
     def show_add_transaction_dialog(self, transaction_type):
-  
-
-        # Save selection state
-        categories = (self.data.INCOME_CATEGORIES if transaction_type == TransactionType.INCOME 
-                    else self.data.EXPENSE_CATEGORIES)
+        """Open the add dialog; it is built once and cleared for every use"""
+        categories = self.data.categories.pairs(transaction_type)
         self.selected_category = categories[0][1]
         self.selected_date = datetime.now()
         self.current_transaction_type = transaction_type
 
-        # Create the actual layout for dialog content
+        if self.add_dialog is None:
+            self.build_add_dialog()
+
+        self.amount_field.text = ""
+        self.description_field.text = ""
+        self.category_button.text = f"{categories[0][0]} {categories[0][1]}"
+        self.date_button.text = self.selected_date.strftime("%Y-%m-%d")
+        self.add_dialog.title = "Add Income" if transaction_type == TransactionType.INCOME else "Add Expense"
+        self.add_dialog.open()
+
+    def build_add_dialog(self):
+        """Create the add transaction dialog; show_add_transaction_dialog fills it in"""
         self.amount_field = MDTextField(
             hint_text="Amount",
             helper_text="Enter amount",
@@ -1000,14 +791,12 @@ class DashboardScreen(MDScreen):
         )
 
         self.category_button = MDRaisedButton(
-            text=f"{categories[0][0]} {categories[0][1]}",
-            on_release=lambda x: self.open_category_menu(categories, transaction_type)
+            on_release=lambda x: self.open_category_menu(
+                self.data.categories.pairs(self.current_transaction_type),
+                self.current_transaction_type)
         )
 
-        self.date_button = MDRaisedButton(
-            text=self.selected_date.strftime("%Y-%m-%d"),
-            on_release=self.open_date_picker
-        )
+        self.date_button = MDRaisedButton(on_release=self.open_date_picker)
 
         # Use MDBoxLayout without height problems
         content = MDBoxLayout(
@@ -1023,10 +812,8 @@ class DashboardScreen(MDScreen):
         content.add_widget(self.category_button)
         content.add_widget(self.date_button)
 
-        title = "Add Income" if transaction_type == TransactionType.INCOME else "Add Expense"
-
         self.add_dialog = MDDialog(
-            title=title,
+            title="",
             type="custom",
             content_cls=content,  # 👈 Directly adding layout (no scroll!)
             buttons=[
@@ -1034,31 +821,38 @@ class DashboardScreen(MDScreen):
                 MDRaisedButton(text="ADD", on_release=self.add_transaction)
             ]
         )
-        self.add_dialog.open()
-
 
     def delete_transaction(self, transaction_id):
         """Delete transaction"""
         if self.data.delete_transaction(transaction_id):
             self.transaction_dialog.dismiss()
-            self.update_dashboard()
             Snackbar(text="Transaction deleted successfully!").open()
         else:
             Snackbar(text="Failed to delete transaction").open()
 
-    def on_enter(self):
-        """Called when screen is entered"""
-        if self.data:
-            self.update_currency_display()
-            self.update_dashboard()
+class TransactionListItem(ThreeLineListItem):
+    """Recycled list row; RecycleView rebinds it to a new transaction as it scrolls"""
+    
+    transaction = ObjectProperty(None, allownone=True)
+    callback = ObjectProperty(None, allownone=True)
+    
+    def on_release(self):
+        if self.transaction is not None and self.callback:
+            self.callback(self.transaction)
 
-class TransactionsScreen(MDScreen):
+class TransactionsScreen(DataScreen):
     """Screen for viewing all transactions"""
     
+    SEARCH_PAGE_SIZE = 50
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.data = None
-        self.build_ui()
+        self.loading_older = False
+        self.filter_dialog = None
+        # Keyword arguments for FinanceData.search while a search is active, else None
+        self.search_query = None
+        self.search_loaded = 0
+        self.search_has_more = False
 
     def build_ui(self):
         # Main layout
@@ -1119,20 +913,29 @@ class TransactionsScreen(MDScreen):
 
         self.filter_layout.add_widget(self.filter_chips)
 
-        # Transactions list
-        self.transactions_scroll = MDScrollView()
-        self.transactions_list = MDList()
-        self.transactions_scroll.add_widget(self.transactions_list)
+        # Transactions list; only rows on screen get widgets
+        self.transactions_view = RecycleView()
+        self.transactions_view.viewclass = TransactionListItem
+        rows_layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(88)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        self.transactions_view.add_widget(rows_layout)
+        self.transactions_view.bind(scroll_y=self.on_list_scroll)
 
         # Add widgets to main layout
         main_layout.add_widget(header)
         main_layout.add_widget(self.filter_layout)
-        main_layout.add_widget(self.transactions_scroll)
+        main_layout.add_widget(self.transactions_view)
 
         self.add_widget(main_layout)
 
-        # Current filter
+        # Current filter, and row data already built for each filter
         self.current_filter = "All"
+        self.row_cache = {}
 
     def add_filter_chip(self, text, is_selected=False):
     
@@ -1155,66 +958,303 @@ class TransactionsScreen(MDScreen):
             chip.md_bg_color = (0.9, 0.9, 0.9, 1)  # Unselected
         selected_chip.md_bg_color = (0.3, 0.7, 0.6, 1)  # Selected
 
-        self.update_transactions_list()
+        self.show_filtered_rows()
+
+    def show_filter_dialog(self, instance):
+        """Show the search and filter dialog"""
+        if self.filter_dialog is None:
+            self.build_filter_dialog()
+        self.filter_dialog.open()
+
+    def build_filter_dialog(self):
+        self.search_field = MDTextField(
+            hint_text="Search",
+            helper_text="Words from the description or category",
+            helper_text_mode="on_focus",
+            icon_right="magnify",
+        )
+        # Results follow the search text as it is typed
+        self.search_field.bind(text=lambda field, text: self.apply_search())
+        self.start_field = MDTextField(hint_text="From (YYYY-MM-DD)")
+        self.end_field = MDTextField(hint_text="To (YYYY-MM-DD)")
+        self.min_amount_field = MDTextField(hint_text="Min amount", input_filter="float")
+        self.max_amount_field = MDTextField(hint_text="Max amount", input_filter="float")
 
+        content = MDBoxLayout(
+            orientation="vertical",
+            padding=dp(10),
+            spacing=dp(10),
+            size_hint_y=None,
+            height=dp(320)
+        )
+        for field in (self.search_field, self.start_field, self.end_field,
+                      self.min_amount_field, self.max_amount_field):
+            content.add_widget(field)
 
+        self.filter_dialog = MDDialog(
+            title="Search & Filter",
+            type="custom",
+            content_cls=content,
+            buttons=[
+                MDFlatButton(text="CLEAR", on_release=self.clear_search),
+                MDRaisedButton(text="APPLY", on_release=lambda x: self.apply_search(close=True))
+            ]
+        )
 
-    def show_filter_dialog(self, instance):
-        """Show advanced filter dialog"""
-        # This could be expanded to include date range, category filters, etc.
-        pass
+    def read_search_fields(self) -> Dict:
+        """FinanceData.search arguments from the dialog; raises ValueError for bad input"""
+        def parse_date(field):
+            text = field.text.strip()
+            return datetime.strptime(text, "%Y-%m-%d").date() if text else None
+
+        def parse_amount(field):
+            text = field.text.strip()
+            return float(text) if text else None
+
+        return {
+            'text': self.search_field.text,
+            'start': parse_date(self.start_field),
+            'end': parse_date(self.end_field),
+            'min_amount': parse_amount(self.min_amount_field),
+            'max_amount': parse_amount(self.max_amount_field)
+        }
+
+    def apply_search(self, close=False):
+        try:
+            query = self.read_search_fields()
+        except ValueError:
+            # Other fields may be half typed while the search text changes
+            if close:
+                Snackbar(text="Please enter dates as YYYY-MM-DD and valid amounts").open()
+            return
+
+        active = query['text'].strip() or any(value is not None for key, value in query.items() if key != 'text')
+        self.search_query = query if active else None
+        if close:
+            self.filter_dialog.dismiss()
+        self.show_filtered_rows()
+
+    def clear_search(self, instance):
+        for field in (self.start_field, self.end_field, self.min_amount_field, self.max_amount_field):
+            field.text = ""
+        self.search_field.text = ""
+        self.search_query = None
+        self.filter_dialog.dismiss()
+        self.show_filtered_rows()
+
+    def load_search_page(self, reset=True):
+        """Fetch the first (or next) page of search results"""
+        data = self.data
+        query = dict(self.search_query, transaction_type=self.filter_transaction_type())
+        offset = 0 if reset else self.search_loaded
+        limit = self.SEARCH_PAGE_SIZE
+
+        def compute():
+            ids = data.search(offset=offset, limit=limit, **query)
+            return reset, [data.get_transaction(transaction_id) for transaction_id in ids]
+
+        if self.worker:
+            self.worker.submit("search", compute, self.show_search_page)
+        else:
+            self.show_search_page(compute())
+
+    def show_search_page(self, result):
+        reset, transactions = result
+        rows = [self.row_data(t) for t in transactions if t is not None]
+        self.search_has_more = len(transactions) == self.SEARCH_PAGE_SIZE
+        if reset:
+            self.search_loaded = len(transactions)
+            self.transactions_view.data = rows or [self.empty_row()]
+        else:
+            self.search_loaded += len(transactions)
+            self.transactions_view.data.extend(rows)
+
+    def filter_transaction_type(self):
+        if self.current_filter == "Income":
+            return TransactionType.INCOME
+        if self.current_filter == "Expense":
+            return TransactionType.EXPENSE
+        return None
 
     def go_back(self, instance):
         """Go back to dashboard"""
         self.manager.current = "dashboard"
 
+    def on_list_scroll(self, view, scroll_y):
+        """Load the next page of results, or the next older month of history, when the list nears its end"""
+        if scroll_y > 0.05 or not self.data:
+            return
+        if self.search_query is not None:
+            pending = self.worker and self.worker.is_pending("search")
+            if self.search_has_more and not pending:
+                self.search_has_more = False
+                self.load_search_page(reset=False)
+            return
+        if self.loading_older or not self.data.has_older():
+            return
+        self.loading_older = True
+        if self.worker:
+            self.worker.submit("older", self.data.load_older, self.on_older_loaded)
+        else:
+            self.on_older_loaded(self.data.load_older())
+
+    def on_older_loaded(self, count):
+        # The rows themselves arrive as a change event
+        self.loading_older = False
+
+    def on_changes(self, events):
+        """Patch the row data of every cached filter, shown or not"""
+        if any(event.kind in ChangeEvent.REBUILDS for event in events):
+            self.update_transactions_list()
+            return
+        # Rows are written in their own currency
+        events = [event for event in events if event.kind != ChangeEvent.CURRENCY]
+        for filter_type, rows in list(self.row_cache.items()):
+            shown = filter_type == self.current_filter and self.search_query is None
+            operations = self.patch_rows(filter_type, rows, events)
+            if operations is None:
+                # Built again when next shown
+                del self.row_cache[filter_type]
+                if shown:
+                    self.show_filtered_rows()
+            elif shown:
+                # The view holds its own copy of the rows; only the changed ones are touched
+                self.apply_operations(self.transactions_view.data, operations)
+        if self.search_query is not None and events:
+            self.load_search_page()
+        self.shown_key = self.view_key()
+
+    def view_key(self):
+        return self.data.version
+
+    def refresh(self):
+        self.show_filtered_rows()
+
+    def patch_rows(self, filter_type, rows, events):
+        """Apply change events to the row data of one filter
+        
+        Returns the (kind, index, row) operations made, so the same ones can be
+        applied to the view, or None when the rows must be rebuilt instead.
+        """
+        transaction_type = {"Income": TransactionType.INCOME, "Expense": TransactionType.EXPENSE}.get(filter_type)
+        operations = []
+
+        def apply(kind, index, row=None):
+            operations.append((kind, index, row))
+            self.apply_operations(rows, [(kind, index, row)])
+
+        def index_of(transaction_id):
+            # Only the unfiltered list lines up with event positions
+            for index, row in enumerate(rows):
+                if row["transaction"].id == transaction_id:
+                    return index
+            return None
+
+        if rows and rows[0]["transaction"] is None:
+            apply("remove", 0)
+        for event in events:
+            if transaction_type is None:
+                if event.kind == ChangeEvent.ADDED:
+                    apply("insert", event.position, self.row_data(event.transaction))
+                    continue
+                if event.position >= len(rows) or rows[event.position]["transaction"].id != event.transaction.id:
+                    return None
+                if event.kind == ChangeEvent.REMOVED:
+                    apply("remove", event.position)
+                else:
+                    apply("replace", event.position, self.row_data(event.transaction))
+                continue
+            index = index_of(event.transaction.id) if event.kind != ChangeEvent.ADDED else None
+            keep = event.kind != ChangeEvent.REMOVED and event.transaction.transaction_type == transaction_type
+            if index is not None and keep:
+                apply("replace", index, self.row_data(event.transaction))
+            elif index is not None:
+                apply("remove", index)
+            elif keep:
+                if event.position != 0:
+                    # Where it goes among the filtered rows is not known
+                    return None
+                apply("insert", 0, self.row_data(event.transaction))
+        if not rows:
+            apply("insert", 0, self.empty_row())
+        return operations
+
+    @staticmethod
+    def apply_operations(rows, operations):
+        for kind, index, row in operations:
+            if kind == "insert":
+                rows.insert(index, row)
+            elif kind == "remove":
+                del rows[index]
+            else:
+                rows[index] = row
+
     def update_transactions_list(self):
-        """Update transactions list based on current filter"""
+        """Rebuild row data from the current transactions; a hidden screen does it when next entered"""
         if not self.data:
             return
 
-        self.transactions_list.clear_widgets()
-        
+        self.row_cache = {}
+        if self.is_shown():
+            self.show_filtered_rows()
+        else:
+            self.shown_key = None
+
+    def show_filtered_rows(self):
+        """Point the list at the row data for the current filter"""
+        if not self.data:
+            return
+        self.shown_key = self.view_key()
+        if self.search_query is not None:
+            self.load_search_page()
+            return
+
+        rows = self.row_cache.get(self.current_filter)
+        if rows is None:
+            rows = self.row_cache[self.current_filter] = self.build_rows(self.current_filter)
+        self.transactions_view.data = rows
+
+    def build_rows(self, filter_type):
+        """Row data dicts for the RecycleView"""
         transactions = self.data.transactions
         
         # Apply filter
-        if self.current_filter == "Income":
+        if filter_type == "Income":
             transactions = [t for t in transactions if t.transaction_type == TransactionType.INCOME]
-        elif self.current_filter == "Expense":
+        elif filter_type == "Expense":
             transactions = [t for t in transactions if t.transaction_type == TransactionType.EXPENSE]
 
         if not transactions:
-            no_data_item = OneLineListItem(
-                text="No transactions found",
-                theme_text_color="Hint"
-            )
-            self.transactions_list.add_widget(no_data_item)
-            return
+            return [self.empty_row()]
+        return [self.row_data(transaction) for transaction in transactions]
 
-        for transaction in transactions:
-            # Get category emoji
-            categories = (self.data.INCOME_CATEGORIES if transaction.transaction_type == TransactionType.INCOME 
-                         else self.data.EXPENSE_CATEGORIES)
-            emoji = "💰"
-            for cat_emoji, cat_name in categories:
-                if cat_name == transaction.category:
-                    emoji = cat_emoji
-                    break
-
-            # Format amount with currency
-            amount_text = self.data.format_amount(transaction.amount)
-            if transaction.transaction_type == TransactionType.EXPENSE:
-                amount_text = f"-{amount_text}"
-            else:
-                amount_text = f"+{amount_text}"
+    @staticmethod
+    def empty_row():
+        # Every row sets the same keys, since views are reused between rows
+        return {
+            "text": "No transactions found",
+            "secondary_text": "",
+            "tertiary_text": "",
+            "theme_text_color": "Hint",
+            "transaction": None,
+            "callback": None
+        }
 
-            item = ThreeLineListItem(
-                text=f"{emoji} {transaction.description}",
-                secondary_text=f"{transaction.category} • {transaction.date.strftime('%Y-%m-%d')}",
-                tertiary_text=amount_text,
-                on_release=lambda x, t=transaction: self.show_transaction_details(t)
-            )
-            self.transactions_list.add_widget(item)
+    def row_data(self, transaction):
+        """Row data dict for one transaction"""
+        emoji = self.data.categories.emoji(transaction.category)
+
+        # Signed amount in the transaction's currency, and its date
+        amount_text, date_text = self.data.display_strings(transaction)
+
+        return {
+            "text": f"{emoji} {transaction.description}",
+            "secondary_text": f"{transaction.category} • {date_text}",
+            "tertiary_text": amount_text,
+            "theme_text_color": "Primary",
+            "transaction": transaction,
+            "callback": self.show_transaction_details
+        }
 
     def show_transaction_details(self, transaction):
         """Show transaction details dialog"""
@@ -1227,7 +1267,7 @@ class TransactionsScreen(MDScreen):
 
         # Transaction details
         details = [
-            ("Amount:", self.data.format_amount(transaction.amount)),
+            ("Amount:", self.data.format_amount(transaction.amount, self.data.currency_of(transaction))),
             ("Type:", transaction.transaction_type.value.title()),
             ("Category:", transaction.category),
             ("Date:", transaction.date.strftime("%Y-%m-%d %H:%M")),
@@ -1276,24 +1316,14 @@ class TransactionsScreen(MDScreen):
     def delete_transaction(self, transaction_id):
         """Delete transaction"""
         if self.data.delete_transaction(transaction_id):
+            # The row is removed by the change event
             self.transaction_dialog.dismiss()
-            self.update_transactions_list()
             Snackbar(text="Transaction deleted successfully!").open()
         else:
             Snackbar(text="Failed to delete transaction").open()
 
-    def on_enter(self):
-        """Called when screen is entered"""
-        if self.data:
-            self.update_transactions_list()
-
-class StatsScreen(MDScreen):
+class StatsScreen(DataScreen):
     """Screen for viewing statistics"""
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.data = None
-        self.build_ui()
 
     def build_ui(self):
         # Main scrollable layout
@@ -1358,6 +1388,15 @@ class StatsScreen(MDScreen):
 
             period_chips.add_widget(chip)
 
+        period_layout.add_widget(period_chips)
+
+        # Shown while statistics for a new period are being computed
+        self.progress_bar = MDProgressBar(
+            type="indeterminate",
+            size_hint_y=None,
+            height=dp(4),
+            opacity=0
+        )
 
         # Summary cards
         self.summary_layout = MDGridLayout(
@@ -1519,6 +1558,7 @@ class StatsScreen(MDScreen):
         # Add all widgets to main layout
         main_layout.add_widget(header)
         main_layout.add_widget(period_layout)
+        main_layout.add_widget(self.progress_bar)
         main_layout.add_widget(self.summary_layout)
         main_layout.add_widget(self.category_header)
         main_layout.add_widget(self.income_categories_card)
@@ -1542,56 +1582,73 @@ class StatsScreen(MDScreen):
         
         self.update_stats()
 
+    def on_period_chip_selected(self, selected_chip, days):
+    
+        self.current_period = days
+
+        for chip in selected_chip.parent.children:
+            chip.md_bg_color = (0.9, 0.9, 0.9, 1)
+        selected_chip.md_bg_color = (0.3, 0.7, 0.6, 1)
+
+        self.update_stats()
+
     def go_back(self, instance):
         """Go back to dashboard"""
         self.manager.current = "dashboard"
 
     def update_stats(self):
-        """Update statistics display"""
+        """Refresh statistics; the query runs on the worker when there is one"""
         if not self.data:
             return
 
-        # Get period stats
-        stats = self.data.get_period_stats(self.current_period)
+        cutoff = datetime.now() - timedelta(days=self.current_period)
+        self.shown_key = self.view_key()
+
+        # Totals, counts and category sums all come from one range query
+        if self.worker:
+            self.progress_bar.opacity = 1
+            self.progress_bar.start()
+            self.worker.submit("stats", lambda: self.compute_stats(cutoff), self.show_stats)
+        else:
+            self.show_stats(self.compute_stats(cutoff))
+
+    def compute_stats(self, cutoff):
+        """Range stats, with the currencies their totals could not convert"""
+        stats = dict(self.data.range_stats(cutoff))
+        stats['unconverted'] = self.data.unconverted_currencies()
+        return stats
+
+    def show_stats(self, stats):
+        """Apply computed statistics to the widgets"""
+        if self.worker:
+            self.progress_bar.stop()
+            self.progress_bar.opacity = 0
         
         # Update summary cards
         self.income_summary_amount.text = self.data.format_amount(stats['income'])
         self.expense_summary_amount.text = self.data.format_amount(stats['expenses'])
         
-        # Count transactions
-        cutoff = datetime.now() - timedelta(days=self.current_period)
-        recent_transactions = [t for t in self.data.transactions if t.date >= cutoff]
-        income_count = len([t for t in recent_transactions if t.transaction_type == TransactionType.INCOME])
-        expense_count = len([t for t in recent_transactions if t.transaction_type == TransactionType.EXPENSE])
-        
-        self.income_summary_count.text = f"{income_count} transactions"
-        self.expense_summary_count.text = f"{expense_count} transactions"
+        note = f" · {', '.join(stats['unconverted'])} not converted" if stats['unconverted'] else ""
+        self.income_summary_count.text = f"{stats['income_count']} transactions{note}"
+        self.expense_summary_count.text = f"{stats['expense_count']} transactions{note}"
 
         # Update category breakdowns
-        self.update_category_breakdown()
+        self.update_category_breakdown(stats['categories'][TransactionType.INCOME],
+                                       stats['categories'][TransactionType.EXPENSE])
 
-    def update_category_breakdown(self):
+    def update_category_breakdown(self, income_categories, expense_categories):
         """Update category breakdown lists"""
         # Clear existing items
         self.income_categories_list.clear_widgets()
         self.expense_categories_list.clear_widgets()
 
-        # Get category stats
-        income_categories = self.data.get_category_stats(TransactionType.INCOME, self.current_period)
-        expense_categories = self.data.get_category_stats(TransactionType.EXPENSE, self.current_period)
-
         # Update income categories
       
 # Update income categories (completing the incomplete section)
         if income_categories:
             sorted_income = sorted(income_categories.items(), key=lambda x: x[1], reverse=True)
             for category, amount in sorted_income:
-                # Get emoji for category
-                emoji = "💰"
-                for cat_emoji, cat_name in self.data.INCOME_CATEGORIES:
-                    if cat_name == category:
-                        emoji = cat_emoji
-                        break
+                emoji = self.data.categories.emoji(category, TransactionType.INCOME)
                 
                 item = TwoLineIconListItem(
                     text=f"{emoji} {category}",
@@ -1609,11 +1666,7 @@ class StatsScreen(MDScreen):
         if expense_categories:
             sorted_expense = sorted(expense_categories.items(), key=lambda x: x[1], reverse=True)
             for category, amount in sorted_expense:
-                emoji = "💸"
-                for cat_emoji, cat_name in self.data.EXPENSE_CATEGORIES:
-                    if cat_name == category:
-                        emoji = cat_emoji
-                        break
+                emoji = self.data.categories.emoji(category, TransactionType.EXPENSE)
                 
                 item = TwoLineIconListItem(
                     text=f"{emoji} {category}",
@@ -1627,10 +1680,11 @@ class StatsScreen(MDScreen):
                 OneLineListItem(text="No expense data", theme_text_color="Hint")
             )
 
-    def on_enter(self):
-        """Called when screen is entered"""
-        if self.data:
-            self.update_stats()
+    def view_key(self):
+        return (self.data.version, date.today(), self.current_period)
+
+    def refresh(self):
+        self.update_stats()
 
 
 # Additional utility classes that might be needed
@@ -1659,16 +1713,22 @@ class FinanceApp(MDApp):
     
     def build(self):
         """Build the app"""
+        self.startup = StartupTimer(STARTED)
+        self.startup.mark("imports + app init")
         self.theme_cls.primary_palette = "Teal"
         self.theme_cls.theme_style = "Light"
         
         # Create screen manager
         sm = ScreenManager()
         
-        # Create data handler
-        data_handler = DataHandler()
+        # Create data handler, and the worker that runs its queries off the UI thread
+        # History is split into month files; startup reads only what the dashboard needs
+        data_handler = DataHandler(snapshot_format="partitioned", preload_days=30, codec="binary")
+        self.data_handler = data_handler
+        self.query_worker = QueryWorker()
+        self.startup.mark("data load")
         
-        # Create screens
+        # Create screens; each builds its widgets when first shown
         dashboard = DashboardScreen(name="dashboard")
         transactions = TransactionsScreen(name="transactions")
         stats = StatsScreen(name="stats")
@@ -1677,14 +1737,35 @@ class FinanceApp(MDApp):
         dashboard.data = data_handler
         transactions.data = data_handler
         stats.data = data_handler
+        dashboard.worker = self.query_worker
+        transactions.worker = self.query_worker
+        stats.worker = self.query_worker
+        
+        # Screens refresh themselves from change events, and only when something changed
+        for screen in (dashboard, transactions, stats):
+            data_handler.subscribe(screen.on_data_changed)
         
         # Add screens to manager
         sm.add_widget(dashboard)
         sm.add_widget(transactions)
         sm.add_widget(stats)
+        self.startup.mark("dashboard build")
         
         return sm
 
+    def on_start(self):
+        """Report startup timing once the first frame has been drawn"""
+        def first_frame(dt):
+            self.startup.mark("first frame")
+            self.startup.report()
+        
+        Clock.schedule_once(first_frame)
+
+    def on_stop(self):
+        """Flush pending saves and journal compaction before exiting"""
+        self.query_worker.shutdown()
+        self.data_handler.close()
+
 
 if __name__ == "__main__":
     FinanceApp().run()
@@ -0,0 +1,91 @@
+"""ColumnarAnalytics gives the same answers with and without NumPy"""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from finance_core import BinaryCodec, MappedColumns, Transaction, TransactionColumns, TransactionType
+from finance_core import analytics
+
+pytest.importorskip("numpy")
+
+CATEGORIES = {TransactionType.INCOME: ["Salary", "Freelance", "Side gig"],
+              TransactionType.EXPENSE: ["Food & Dining", "Transportation", "Custom 🍩"]}
+
+
+def sample(count=500, seed=7):
+    generator = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    rows = []
+    for _ in range(count):
+        transaction_type = generator.choice(list(CATEGORIES))
+        rows.append(Transaction(round(generator.uniform(0.01, 900), 2), "row", transaction_type,
+                                generator.choice(CATEGORIES[transaction_type]),
+                                start + timedelta(minutes=generator.randrange(60 * 24 * 500)),
+                                generator.choice(["USD", "EUR", None])))
+    return rows
+
+
+def assert_same_stats(expected, actual):
+    assert actual.keys() == expected.keys()
+    for key in ('income', 'expenses', 'balance'):
+        assert actual[key] == pytest.approx(expected[key], rel=1e-12)
+    assert (actual['income_count'], actual['expense_count']) == (expected['income_count'], expected['expense_count'])
+    for transaction_type in CATEGORIES:
+        assert actual['categories'][transaction_type] == pytest.approx(expected['categories'][transaction_type],
+                                                                       rel=1e-12)
+
+
+RANGES = [(None, None), (date(2023, 3, 1), None), (None, date(2023, 9, 15)),
+          (datetime(2023, 2, 3, 12), datetime(2024, 1, 1)), (date(2030, 1, 1), None)]
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_range_stats_match_the_python_fallback(start, end):
+    columns = TransactionColumns.from_transactions(sample())
+    assert_same_stats(analytics.ColumnarAnalytics(columns, use_numpy=False).range_stats(start, end),
+                      analytics.ColumnarAnalytics(columns, use_numpy=True).range_stats(start, end))
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_mapped_date_sorted_columns_match_the_python_fallback(tmp_path, start, end):
+    path = str(tmp_path / "history.fdb")
+    with open(path, 'wb') as f:
+        BinaryCodec().dump(f, sorted(sample(), key=lambda t: t.date), {'order': 'date'})
+    columns = MappedColumns(path)
+    try:
+        fast = analytics.ColumnarAnalytics(columns, use_numpy=True)
+        slow = analytics.ColumnarAnalytics(columns, use_numpy=False)
+        assert_same_stats(slow.range_stats(start, end), fast.range_stats(start, end))
+        del fast
+    finally:
+        columns.close()
+
+
+def test_period_and_category_stats_match_the_python_fallback():
+    now = datetime.now()
+    rows = sample()
+    for i, transaction in enumerate(rows):
+        transaction.date = now - timedelta(hours=7 * i)
+    columns = TransactionColumns.from_transactions(rows)
+    fast = analytics.ColumnarAnalytics(columns, use_numpy=True)
+    slow = analytics.ColumnarAnalytics(columns, use_numpy=False)
+    for days in (1, 30, 365):
+        expected, actual = slow.get_period_stats(days), fast.get_period_stats(days)
+        assert {key: actual[key] for key in expected} == pytest.approx(expected, rel=1e-12)
+        for transaction_type in CATEGORIES:
+            assert fast.get_category_stats(transaction_type, days) == pytest.approx(
+                slow.get_category_stats(transaction_type, days), rel=1e-12)
+
+
+def test_converted_amounts_match_the_python_fallback(monkeypatch):
+    columns = TransactionColumns.from_transactions(sample())
+
+    def factor(code, day):
+        return 1.0 + code * 0.1 + day.toordinal() % 7 * 0.01
+
+    fast = list(analytics.converted_amounts(columns, factor))
+    # As if NumPy were not installed
+    monkeypatch.setattr(analytics, "np", False)
+    slow = list(analytics.converted_amounts(columns, factor))
+    assert fast == pytest.approx(slow, rel=1e-12)
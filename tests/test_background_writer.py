@@ -0,0 +1,72 @@
+"""Debounced saves through BackgroundWriter"""
+import threading
+
+from finance_core import BackgroundWriter, FinanceData, TransactionType
+
+
+def test_changes_inside_the_window_share_one_write():
+    saved = []
+    writer = BackgroundWriter(lambda: saved.append(1), delay=60)
+    for _ in range(50):
+        writer.mark_dirty()
+    writer.flush()
+    assert saved == [1]
+    assert writer.writes == 1
+    assert writer.coalesced_writes == 49
+    writer.close()
+
+
+def test_flush_waits_for_the_write_in_progress():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_save():
+        started.set()
+        release.wait(5)
+
+    writer = BackgroundWriter(slow_save, delay=0)
+    writer.mark_dirty()
+    assert started.wait(5)
+    flushed = threading.Thread(target=writer.flush)
+    flushed.start()
+    flushed.join(0.1)
+    assert flushed.is_alive()
+    release.set()
+    flushed.join(5)
+    assert not flushed.is_alive()
+    assert writer.writes == 1
+    writer.close()
+
+
+def test_failed_save_is_counted_and_does_not_stop_the_writer(capsys):
+    calls = []
+
+    def save():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    writer = BackgroundWriter(save, delay=0)
+    writer.mark_dirty()
+    writer.flush()
+    writer.mark_dirty()
+    writer.flush()
+    assert len(calls) == 2
+    assert "disk full" in capsys.readouterr().out
+    writer.close()
+
+
+def test_json_mode_saves_atomically_in_the_background(tmp_path):
+    path = str(tmp_path / "data.json")
+    data = FinanceData(path, save_delay=60)
+    for i in range(20):
+        data.add_transaction(i + 1, f"item {i}", TransactionType.EXPENSE, "Food & Dining")
+    data.flush()
+    assert data.writer.writes == 1
+    assert not (tmp_path / "data.json.tmp").exists()
+    data.close()
+
+    reloaded = FinanceData(path)
+    try:
+        assert len(reloaded.transactions) == 20
+    finally:
+        reloaded.close()
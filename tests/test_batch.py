@@ -0,0 +1,37 @@
+"""add_transactions and delete_transactions on every backend"""
+import pytest
+
+from finance_core import FinanceData, SqliteFinanceData
+
+
+@pytest.fixture(params=["journal", "json", "sqlite"])
+def data(request, tmp_path):
+    if request.param == "sqlite":
+        finance = SqliteFinanceData(str(tmp_path / "data.db"))
+    else:
+        finance = FinanceData(str(tmp_path / "data.json"), storage_mode=request.param)
+    yield finance
+    finance.close()
+
+
+def test_batch_is_added_whole(data, item):
+    assert data.add_transactions([item(i + 1) for i in range(10)])
+    assert len(data.transactions) == 10
+    assert data.get_balance() == pytest.approx(-55)
+
+
+@pytest.mark.parametrize("fields", [dict(amount=-5), dict(amount=0), dict(amount=5, description="   ")])
+def test_invalid_item_rejects_the_whole_batch(data, item, fields):
+    bad = item(**fields)
+    assert data.add_transaction(bad['amount'], bad['description'], bad['transaction_type'],
+                                bad['category']) is False
+    assert data.add_transactions([item(1), bad]) is False
+    assert data.transactions == []
+
+
+def test_delete_batch(data, item):
+    data.add_transactions([item(i + 1) for i in range(10)])
+    ids = [t.id for t in data.transactions[:4]]
+    assert data.delete_transactions(ids + ["missing"])
+    assert len(data.transactions) == 6
+    assert not set(ids) & {t.id for t in data.transactions}
@@ -0,0 +1,68 @@
+"""CategoryRegistry lookups, persistence and saved-code collisions"""
+import json
+import logging
+
+import pytest
+
+from finance_core import EXPENSE_CATEGORIES, INCOME_CATEGORIES, CategoryRegistry, TransactionType
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "data.categories.json")
+
+
+def test_builtin_lookups():
+    registry = CategoryRegistry()
+    assert registry.pairs(TransactionType.INCOME) == list(INCOME_CATEGORIES)
+    assert registry.pairs(TransactionType.EXPENSE) == list(EXPENSE_CATEGORIES)
+    emoji, name = EXPENSE_CATEGORIES[0]
+    assert name in registry
+    assert registry.get(name).code == len(INCOME_CATEGORIES)
+    assert registry.emoji(name) == emoji
+    assert registry.emoji("Unknown", TransactionType.EXPENSE) == CategoryRegistry.DEFAULT_EMOJI[TransactionType.EXPENSE]
+    assert registry.get("Unknown") is None
+    # Unregistered names get a code without becoming categories
+    code = registry.code_of("Imported")
+    assert code == len(INCOME_CATEGORIES) + len(EXPENSE_CATEGORIES)
+    assert registry.code_of("Imported") == code
+    assert "Imported" not in registry
+
+
+def test_user_categories_are_saved_and_reloaded(path):
+    registry = CategoryRegistry(path)
+    pets = registry.add("Pets", "🐶", TransactionType.EXPENSE, budget=50)
+    with pytest.raises(ValueError):
+        registry.add("Pets", "🐱", TransactionType.EXPENSE)
+    builtin = EXPENSE_CATEGORIES[0][1]
+    assert registry.update(builtin, budget=300)
+
+    reloaded = CategoryRegistry(path)
+    assert reloaded.get("Pets").to_dict() == pets.to_dict()
+    assert reloaded.get(builtin).budget == 300
+    assert "Pets" in reloaded.names(TransactionType.EXPENSE)
+
+    assert reloaded.remove("Pets")
+    assert not reloaded.remove(builtin)
+    assert "Pets" not in CategoryRegistry(path)
+
+
+def test_saved_category_with_a_taken_code_is_moved_not_dropped(path, caplog):
+    taken = len(INCOME_CATEGORIES)  # The first built-in expense category
+    free = len(INCOME_CATEGORIES) + len(EXPENSE_CATEGORIES)
+    records = [
+        {'name': "Pets", 'emoji': "🐶", 'transaction_type': "expense", 'color': "#123456", 'code': taken},
+        {'name': "Pets", 'emoji': "🐱", 'transaction_type': "expense", 'color': "#654321", 'code': free + 5},
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'categories': records}, f)
+
+    with caplog.at_level(logging.WARNING, logger="finance_core.categories"):
+        registry = CategoryRegistry(path)
+    assert len(caplog.records) == 2
+    pets = registry.get("Pets")
+    assert (pets.emoji, pets.code) == ("🐶", free)
+    assert registry.table[taken] == EXPENSE_CATEGORIES[0][1]
+    assert registry.table[free] == "Pets"
+    # The new code is saved, so it stays the same from now on
+    assert CategoryRegistry(path).get("Pets").code == free
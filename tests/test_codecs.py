@@ -0,0 +1,116 @@
+"""Round trips through the JSON and binary snapshot codecs"""
+from datetime import datetime
+
+import pytest
+
+from finance_core import BinaryCodec, FinanceData, JsonCodec, MappedColumns, Transaction, TransactionType
+
+CODECS = [JsonCodec(), BinaryCodec()]
+
+
+def sample_transactions():
+    unicode_row = Transaction(12.5, "Café ☕ – naïve", TransactionType.EXPENSE, "Custom 🍩 category",
+                              datetime(2024, 2, 29, 23, 59, 59), "EUR")
+    imported = Transaction(0.01, "Long id", TransactionType.INCOME, "Salary", datetime(1999, 12, 31), "JPY")
+    imported.id = "imported-0123456789-ofx-FITID-0000000000000042"
+    legacy = Transaction(1234567.89, "No currency", TransactionType.EXPENSE, "Food & Dining",
+                         datetime(2024, 1, 1, 8, 30))
+    legacy.currency = None
+    usd = Transaction(5, "Coffee", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 2), "USD")
+    return [unicode_row, imported, legacy, usd]
+
+
+def round_trip(codec, transactions, path, meta=None):
+    with open(path, 'wb' if codec.binary else 'w') as f:
+        codec.dump(f, transactions, meta)
+    with open(path, 'rb') as f:
+        return codec.load(f)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+def test_round_trip_keeps_every_field(codec, tmp_path):
+    transactions = sample_transactions()
+    meta = {'currency_code': "EUR", 'base_currency': "USD"}
+    loaded, loaded_meta = round_trip(codec, transactions, tmp_path / f"data{codec.extension}", meta)
+    assert loaded_meta == meta
+    assert [t.to_dict() for t in loaded] == [t.to_dict() for t in transactions]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+def test_round_trip_of_empty_list(codec, tmp_path):
+    loaded, meta = round_trip(codec, [], tmp_path / f"empty{codec.extension}", {'currency_code': "USD"})
+    assert loaded == []
+    assert meta == {'currency_code': "USD"}
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+def test_currency_column_keeps_missing_currency(codec, tmp_path):
+    loaded, _ = round_trip(codec, sample_transactions(), tmp_path / f"data{codec.extension}")
+    assert [t.currency for t in loaded] == ["EUR", "JPY", None, "USD"]
+
+
+def as_version_2(path):
+    """Rewrite a binary file as version 2 wrote it, without the id order"""
+    with open(path, 'rb') as f:
+        buffer = bytearray(f.read())
+    magic, _, flags, rows, meta_length = BinaryCodec.HEADER.unpack_from(buffer)
+    start, _ = BinaryCodec.layout(rows, meta_length)['id_order']
+    end, _ = BinaryCodec.layout(rows, meta_length)['tables']
+    del buffer[start:end]
+    BinaryCodec.HEADER.pack_into(buffer, 0, magic, 2, flags, rows, meta_length)
+    with open(path, 'wb') as f:
+        f.write(buffer)
+
+
+def test_binary_file_is_version_3(tmp_path):
+    path = tmp_path / "data.bin"
+    round_trip(BinaryCodec(), sample_transactions(), path)
+    with open(path, 'rb') as f:
+        magic, version, _, rows, _ = BinaryCodec.HEADER.unpack_from(f.read())
+    assert (magic, version, rows) == (BinaryCodec.MAGIC, 3, 4)
+
+
+def test_version_2_file_is_still_read(tmp_path):
+    transactions = sorted(sample_transactions(), key=lambda t: t.date)
+    path = tmp_path / "history.bin"
+    round_trip(BinaryCodec(), transactions, path, {'order': 'date'})
+    as_version_2(path)
+    with open(path, 'rb') as f:
+        loaded, _ = BinaryCodec().load(f)
+    assert [t.to_dict() for t in loaded] == [t.to_dict() for t in transactions]
+    history = MappedColumns(str(path))
+    try:
+        assert not history.has_id_order
+        assert [history.find(t.id) for t in transactions] == [0, 1, 2, 3]
+    finally:
+        history.close()
+
+
+def test_mapped_columns_read_what_binary_codec_wrote(tmp_path):
+    transactions = sorted(sample_transactions(), key=lambda t: t.date)
+    path = tmp_path / "history.bin"
+    round_trip(BinaryCodec(), transactions, path)
+    history = MappedColumns(str(path))
+    try:
+        assert [t.to_dict() for t in history.to_transactions()] == [t.to_dict() for t in transactions]
+        assert history.has_id_order
+        assert [history.find(t.id) for t in transactions] == [0, 1, 2, 3]
+        assert history.find("missing") is None
+    finally:
+        history.close()
+
+
+def test_mapped_storage_rewrites_a_version_2_history(tmp_path):
+    path = str(tmp_path / "history.fdb")
+    data = FinanceData(path, storage_mode="mapped", codec="binary")
+    for i in range(3):
+        data.add_transaction(i + 1, f"row {i}", TransactionType.EXPENSE, "Food & Dining")
+    data.compact()
+    data.close()
+    as_version_2(path)
+
+    reloaded = FinanceData(path, storage_mode="mapped", codec="binary")
+    assert reloaded._history.has_id_order
+    assert sorted(t.amount for t in reloaded.transactions) == [1.0, 2.0, 3.0]
+    assert all(reloaded.get_transaction(t.id).amount == t.amount for t in reloaded.transactions)
+    reloaded.close()
@@ -0,0 +1,105 @@
+"""Change events sent to listeners, and the version views use to skip refreshing"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import ChangeEvent, FinanceData, TransactionType
+
+
+def listen(data):
+    batches = []
+    data.subscribe(lambda events: batches.append([event.kind for event in events]))
+    return batches
+
+
+def test_each_change_calls_listeners_once_and_bumps_version_once(data):
+    batches = listen(data)
+    version = data.version
+    data.add_transaction(5, "Pay", TransactionType.INCOME, "Salary", datetime(2024, 1, 1))
+    assert (batches, data.version) == ([[ChangeEvent.ADDED]], version + 1)
+
+    transaction_id = data.transactions[0].id
+    assert data.update_transaction(transaction_id, amount=7)
+    assert (batches[-1], data.version) == ([ChangeEvent.UPDATED], version + 2)
+    data.set_currency("EUR")
+    assert (batches[-1], data.version) == ([ChangeEvent.CURRENCY], version + 3)
+    assert data.delete_transaction(transaction_id)
+    assert (batches[-1], data.version) == ([ChangeEvent.REMOVED], version + 4)
+    assert len(batches) == 4
+
+    # A batch is one change, however many rows it adds
+    data.add_transactions([dict(amount=i + 1, description=f"Lunch {i}", transaction_type=TransactionType.EXPENSE,
+                                category="Food & Dining", date=datetime(2024, 2, 1)) for i in range(3)])
+    assert (batches[-1], data.version) == ([ChangeEvent.ADDED] * 3, version + 5)
+
+
+def test_no_op_changes_leave_version_alone(data):
+    data.add_transaction(5, "Lunch", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 1))
+    batches = listen(data)
+    version = data.version
+    data.delete_transaction("missing")
+    assert not data.update_transaction("missing", amount=1)
+    data.range_stats()
+    assert (batches, data.version) == ([], version)
+
+
+def test_loading_older_rows_is_not_a_change(tmp_path):
+    path = str(tmp_path / "data.json")
+    now = datetime.now()
+    data = FinanceData(path, snapshot_format="partitioned")
+    data.add_transactions([dict(amount=i + 1, description=f"Lunch {i}", transaction_type=TransactionType.EXPENSE,
+                                category="Food & Dining", date=now - timedelta(days=i * 7)) for i in range(30)])
+    data.save_data()
+    data.close()
+
+    data = FinanceData(path, snapshot_format="partitioned", preload_days=30)
+    batches = listen(data)
+    version = data.version
+    data.range_stats(now - timedelta(days=200))
+    assert batches == [[ChangeEvent.LOADED]]
+    assert data.version == version
+    data.close()
+
+
+def test_screen_refreshes_only_when_the_version_changes(data):
+    pytest.importorskip("kivymd")
+    from main import DataScreen
+
+    class Screen:
+        # DataScreen's refresh logic, without building widgets
+        view_key = DataScreen.view_key
+        refresh_if_stale = DataScreen.refresh_if_stale
+        on_changes = DataScreen.on_changes
+        is_shown = DataScreen.is_shown
+        name = "shown"
+
+        def __init__(self, data):
+            self.data = data
+            self.manager = None
+            self.shown_key = None
+            self.refreshes = 0
+
+        def refresh(self):
+            self.refreshes += 1
+            self.shown_key = self.view_key()
+
+    screen = Screen(data)
+    data.subscribe(screen.on_changes)
+    screen.refresh_if_stale()
+    screen.refresh_if_stale()
+    assert screen.refreshes == 1
+
+    # Hidden screens wait until they are entered again
+    data.add_transaction(5, "Lunch", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 1))
+    assert screen.refreshes == 1
+    screen.refresh_if_stale()
+    assert screen.refreshes == 2
+
+    class Manager:
+        current = "shown"
+
+    screen.manager = Manager()
+    data.add_transaction(6, "Dinner", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 2))
+    assert screen.refreshes == 3
+    screen.refresh_if_stale()
+    assert screen.refreshes == 3
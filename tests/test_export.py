@@ -0,0 +1,73 @@
+"""Streamed CSV and JSON Lines exports read back as the data they came from"""
+import csv
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import FinanceData, SqliteFinanceData, StatementImporter, Transaction, TransactionType
+
+
+@pytest.fixture(params=["journal", "partitioned", "mapped", "sqlite"])
+def data(request, tmp_path):
+    if request.param == "sqlite":
+        finance = SqliteFinanceData(str(tmp_path / "data.db"))
+    elif request.param == "partitioned":
+        finance = FinanceData(str(tmp_path / "data.json"), snapshot_format="partitioned")
+    else:
+        finance = FinanceData(str(tmp_path / "data.fdb"), storage_mode=request.param)
+    start = datetime(2024, 1, 30, 8, 15)
+    descriptions = ["Plain", 'Quote "this", please', "Two\nlines", "Café ☕", " padded\t"]
+    finance.add_transactions([
+        dict(amount=round(1.1 * (i + 1), 2), description=descriptions[i % len(descriptions)],
+             transaction_type=TransactionType.INCOME if i % 3 == 0 else TransactionType.EXPENSE,
+             category="Salary" if i % 3 == 0 else "Food & Dining", date=start + timedelta(days=i, hours=i),
+             currency="EUR" if i % 4 == 0 else None)
+        for i in range(40)
+    ])
+    finance.save_data()
+    # Rows both in the stored history and only in memory, including a deleted one
+    finance.add_transaction(9.99, "Late, edit", TransactionType.EXPENSE, "Shopping", start + timedelta(days=3))
+    finance.delete_transaction(next(finance.iter_transactions()).id)
+    yield finance
+    finance.close()
+
+
+def stored(data):
+    return [t.to_dict() for t in data.iter_transactions()]
+
+
+def test_jsonl_export_reads_back_identical(data, tmp_path):
+    path = str(tmp_path / "export.jsonl")
+    assert data.export_jsonl(path)
+    with open(path, encoding='utf-8') as f:
+        exported = [Transaction.from_dict(json.loads(line)).to_dict() for line in f]
+    assert exported == stored(data)
+    assert len(exported) == 40
+
+
+def test_csv_export_reads_back_identical(data, tmp_path):
+    path = str(tmp_path / "export.csv")
+    assert data.export_csv(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        exported = list(csv.DictReader(f))
+    assert list(exported[0]) == list(data.EXPORT_COLUMNS)
+    expected = [{'Date': t['date'], 'Type': t['transaction_type'], 'Category': t['category'],
+                 'Description': t['description'],
+                 'Amount': t['amount'] if t['transaction_type'] == "income" else -t['amount'],
+                 'Currency': t['currency'] or data.currency_code, 'ID': t['id']} for t in stored(data)]
+    assert [dict(row, Amount=float(row['Amount'])) for row in exported] == expected
+
+
+def test_csv_export_imports_into_new_data(data, tmp_path):
+    path = str(tmp_path / "export.csv")
+    assert data.export_csv(path)
+    copy = FinanceData(str(tmp_path / "copy.json"), storage_mode="journal")
+    result = StatementImporter(copy).import_file(path)
+    assert (result['imported'], result['skipped']) == (40, 0)
+
+    def rows(finance):
+        return sorted((t.date, t.amount, t.transaction_type, t.category, t.description, finance.currency_of(t))
+                      for t in finance.iter_transactions())
+    assert rows(copy) == rows(data)
+    copy.close()
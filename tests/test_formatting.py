@@ -0,0 +1,60 @@
+"""Amount and date strings, and the per-row cache of DisplayFormatter"""
+from datetime import datetime
+
+import pytest
+
+from finance_core import Transaction, TransactionType
+from finance_core.formatting import CurrencyFormat, DisplayFormatter
+
+
+@pytest.mark.parametrize("code, amount, expected", [
+    ("USD", 1234567.891, "$1,234,567.89"),
+    ("USD", -5, "-$5.00"),
+    ("JPY", 1234.5, "¥1,234"),
+    ("INR", 12345678.9, "₹1,23,45,678.90"),
+])
+def test_currency_formats(code, amount, expected):
+    assert CurrencyFormat.for_currency(code).format(amount) == expected
+
+
+def test_cached_row_strings_match_format_amount():
+    formatter = DisplayFormatter()
+    income = Transaction(1234.5, "Pay", TransactionType.INCOME, "Salary", datetime(2024, 2, 1), "EUR")
+    expense = Transaction(3, "Bus", TransactionType.EXPENSE, "Transportation", datetime(2024, 2, 2))
+    expense.currency = None
+    for _ in range(2):
+        assert formatter.row_strings(income, "USD") == (formatter.format_amount(1234.5, "EUR", "+"), "2024-02-01")
+        assert formatter.row_strings(expense, "GBP") == (formatter.format_amount(3, "GBP", "-"), "2024-02-02")
+
+
+def test_cache_drops_the_oldest_row_when_full():
+    formatter = DisplayFormatter(cache_size=2)
+    rows = [Transaction(i + 1, f"row {i}", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 1), "USD")
+            for i in range(3)]
+    for transaction in rows:
+        formatter.row_strings(transaction, "USD")
+    assert list(formatter._rows) == [rows[1].id, rows[2].id]
+
+
+def test_currency_switch_changes_totals_but_not_rows(data):
+    data.add_transaction(1234.5, "Lunch", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 3, 1))
+    transaction = data.transactions[0]
+    row = data.display_strings(transaction)
+    assert row == ("-$1,234.50", "2024-03-01")
+    assert data.format_amount(1234.5) == "$1,234.50"
+
+    data.set_currency("EUR")
+    assert data.format_amount(1234.5) == data.formatter.format_amount(1234.5, "EUR") != "$1,234.50"
+    assert data.format_number(1234.5, "JPY") == "1,234"
+    # Rows keep the currency they were entered in
+    assert data.display_strings(transaction) == row
+
+
+def test_edited_and_reloaded_rows_are_formatted_again(data):
+    data.add_transaction(5, "Lunch", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 3, 1))
+    transaction_id = data.transactions[0].id
+    assert data.display_strings(data.transactions[0])[0] == "-$5.00"
+    data.update_transaction(transaction_id, amount=7, currency="EUR")
+    assert data.display_strings(data.get_transaction(transaction_id))[0] == data.formatter.format_amount(7, "EUR", "-")
+    data.load_data()
+    assert data.formatter._rows == {}
@@ -0,0 +1,53 @@
+"""Exchange rates, and totals that include amounts without a rate"""
+import json
+import logging
+from datetime import date, datetime
+
+import pytest
+
+from finance_core import ExchangeRates, FinanceData, SqliteFinanceData, TransactionType
+
+
+@pytest.fixture
+def rates():
+    return ExchangeRates("USD", {"EUR": {"2024-01-01": 0.5, "2024-01-10": 0.8}})
+
+
+def test_factor_uses_latest_earlier_quote(rates):
+    assert rates.factor("USD", "EUR", date(2024, 1, 5)) == 0.5
+    assert rates.factor("EUR", "USD", date(2024, 1, 12)) == pytest.approx(1.25)
+    assert rates.convert(10, "USD", "EUR", date(2023, 12, 1)) == 5
+
+
+def test_missing_rate_is_reported_not_replaced(rates, caplog):
+    with caplog.at_level(logging.WARNING, logger="finance_core.fx"):
+        assert rates.factor("GBP", "USD", date(2024, 1, 5)) is None
+        assert rates.factor("GBP", "USD", date(2024, 1, 6)) is None
+        assert rates.convert(10, "USD", "GBP", date(2024, 1, 5)) is None
+    assert rates.missing == {("GBP", "USD"), ("USD", "GBP")}
+    # Logged once per pair, not once per day
+    assert len(caplog.records) == 2
+
+    rates.set_rates("GBP", {"2024-01-01": 0.75})
+    assert rates.missing == set()
+    assert rates.factor("GBP", "USD", date(2024, 1, 5)) == pytest.approx(4 / 3)
+
+
+@pytest.mark.parametrize("backend", [FinanceData, SqliteFinanceData], ids=lambda backend: backend.__name__)
+def test_totals_name_the_currencies_they_could_not_convert(backend, tmp_path):
+    rates_file = tmp_path / "rates.json"
+    rates_file.write_text(json.dumps({'base': "USD", 'rates': {"EUR": {"2024-01-01": 0.5}}}))
+    suffix = ".db" if backend is SqliteFinanceData else ".json"
+    data = backend(str(tmp_path / f"data{suffix}"), rates_file=str(rates_file))
+    try:
+        data.add_transaction(10, "in euros", TransactionType.INCOME, "Salary", datetime(2024, 1, 2), "EUR")
+        data.range_stats()
+        assert data.unconverted_currencies() == []
+
+        data.add_transaction(3, "in pounds", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 1, 2), "GBP")
+        stats = data.range_stats()
+        assert stats['income'] == pytest.approx(20)
+        assert stats['expenses'] == pytest.approx(3)
+        assert data.unconverted_currencies() == ["GBP"]
+    finally:
+        data.close()
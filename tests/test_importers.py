@@ -0,0 +1,116 @@
+"""Statement import from CSV, OFX and QIF files"""
+from datetime import datetime
+
+import pytest
+
+from finance_core import StatementImporter, TransactionType
+
+
+def import_text(data, tmp_path, name, text, **kwargs):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return StatementImporter(data, **kwargs).import_file(str(path))
+
+
+def rows(data):
+    return sorted((t.date, t.amount, t.transaction_type, t.description, t.category, t.currency)
+                  for t in data.transactions)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1234.56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("-1.234,56", -1234.56),
+    ("1 234,56", 1234.56),
+    ("1.234.567", 1234567),
+    ("1,234", 1234),
+    ("12,5", 12.5),
+    ("(1,234.56)", -1234.56),
+    ("€ 1.234,56", 1234.56),
+    ("", 0.0),
+])
+def test_parse_amount_reads_both_separator_conventions(text, expected):
+    assert StatementImporter.parse_amount(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", ["abc", "1,2,3", "12,34,56", "1.234,56.7", "-"])
+def test_parse_amount_rejects_malformed_numbers(text):
+    with pytest.raises(ValueError):
+        StatementImporter.parse_amount(text)
+
+
+def test_csv_import_with_locale_amounts_and_bad_rows(data, tmp_path):
+    text = ("Date;Amount;Description;Category\n"
+            "2024-01-05;-1.234,56;Rent;Housing\n"
+            "05.01.2024;2.500,00;Salary;Salary\n"
+            "2024-01-07;oops;Broken amount;\n"
+            "not a date;10,00;Broken date;\n"
+            "2024-01-08;5,00;;\n")
+    report = import_text(data, tmp_path, "statement.csv", text, delimiter=";", currency="EUR")
+    assert report['imported'] == 2
+    assert report['skipped'] == 3
+    assert [error.split(":")[0] for error in report['errors']] == ["line 4", "line 5", "line 6"]
+    assert rows(data) == [
+        (datetime(2024, 1, 5), 1234.56, TransactionType.EXPENSE, "Rent", "Housing", "EUR"),
+        (datetime(2024, 1, 5), 2500.0, TransactionType.INCOME, "Salary", "Salary", "EUR"),
+    ]
+
+
+def test_csv_debit_and_credit_columns(data, tmp_path):
+    text = "Date,Debit,Credit,Description\n2024-02-01,12.50,,Lunch\n2024-02-02,,100,Refund\n"
+    report = import_text(data, tmp_path, "statement.csv", text,
+                         columns={'amount': None, 'debit': 'Debit', 'credit': 'Credit'})
+    assert report['imported'] == 2
+    assert [(t.amount, t.transaction_type) for t in sorted(data.transactions, key=lambda t: t.date)] == [
+        (12.5, TransactionType.EXPENSE), (100.0, TransactionType.INCOME)]
+
+
+def test_ofx_import_uses_the_statement_currency(data, tmp_path):
+    text = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>GBP
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240310120000<TRNAMT>-42.10<NAME>Grocer</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240311<TRNAMT>1000.00<NAME>Employer<MEMO>March</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240312<TRNAMT>0<NAME>Zero</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+    report = import_text(data, tmp_path, "statement.ofx", text)
+    assert (report['imported'], report['skipped']) == (2, 1)
+    assert rows(data) == [
+        (datetime(2024, 3, 10), 42.1, TransactionType.EXPENSE, "Grocer", "Other Expense", "GBP"),
+        (datetime(2024, 3, 11), 1000.0, TransactionType.INCOME, "Employer", "Other Income", "GBP"),
+    ]
+
+
+def test_qif_import_with_category_map(data, tmp_path):
+    text = """!Type:Bank
+D1/15'24
+T-25.00
+PCoffee Shop
+LDining
+^
+D01/16/2024
+T1,500.00
+PPayroll
+^
+D01/17/2024
+PNo amount
+^
+"""
+    report = import_text(data, tmp_path, "statement.qif", text, category_map={'Dining': "Food & Dining"})
+    assert (report['imported'], report['skipped']) == (2, 1)
+    assert rows(data) == [
+        (datetime(2024, 1, 15), 25.0, TransactionType.EXPENSE, "Coffee Shop", "Food & Dining", "USD"),
+        (datetime(2024, 1, 16), 1500.0, TransactionType.INCOME, "Payroll", "Other Income", "USD"),
+    ]
+
+
+def test_import_commits_in_batches(data, tmp_path):
+    text = "Date,Amount,Description\n" + "".join(f"2024-01-{day:02d},-{day},Row {day}\n" for day in range(1, 11))
+    progress = []
+    report = import_text(data, tmp_path, "statement.csv", text, batch_size=4,
+                         progress=lambda imported, skipped, fraction: progress.append(imported))
+    assert report['imported'] == 10
+    assert progress == [4, 8, 10]
+    assert data.get_balance() == pytest.approx(-55)
@@ -0,0 +1,156 @@
+"""Journal replay on top of snapshots, including after edits and crashes"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+from finance_core import BinaryCodec, FinanceData, TransactionType
+
+
+def open_data(path, **kwargs):
+    return FinanceData(path, storage_mode="journal", **kwargs)
+
+
+def amounts(data):
+    return sorted(t.amount for t in data.transactions)
+
+
+def test_replay_without_snapshot(path):
+    data = open_data(path)
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    data.add_transactions([dict(amount=i + 1, description=f"b{i}", transaction_type=TransactionType.INCOME,
+                                category="Salary") for i in range(3)])
+    data.delete_transaction(data.transactions[0].id)
+    data.close()
+
+    reloaded = open_data(path)
+    assert amounts(reloaded) == [1.0, 2.0, 10.0]
+    reloaded.close()
+
+
+def test_save_after_edit_keeps_one_row(path, capsys):
+    data = open_data(path)
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    transaction_id = data.transactions[0].id
+    assert data.update_transaction(transaction_id, amount=99)
+    data.save_data()
+    data.close()
+    assert not os.path.exists(path + ".journal")
+
+    reloaded = open_data(path)
+    assert amounts(reloaded) == [99.0]
+    assert reloaded.get_balance() == -99
+    assert reloaded.duplicate_ids == []
+    assert "duplicate" not in capsys.readouterr().out
+    reloaded.close()
+
+
+def test_edit_is_replayed_over_the_snapshot(path):
+    data = open_data(path)
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    transaction_id = data.transactions[0].id
+    data.save_data()
+    data.update_transaction(transaction_id, amount=42, description="dinner")
+    data.close()
+
+    reloaded = open_data(path)
+    assert [(t.id, t.amount, t.description) for t in reloaded.transactions] == [(transaction_id, 42.0, "dinner")]
+    reloaded.close()
+
+
+def test_records_left_by_a_crash_after_the_snapshot_are_harmless(path):
+    data = open_data(path)
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    transaction_id = data.transactions[0].id
+    data.update_transaction(transaction_id, amount=99)
+    data.close()
+    # Keep the journal as a crash during compaction would: snapshot written, records not yet dropped
+    shutil.copy(path + ".journal", path + ".journal.saved")
+    data = open_data(path)
+    data.save_data()
+    data.close()
+    os.replace(path + ".journal.saved", path + ".journal.compacting")
+
+    reloaded = open_data(path)
+    assert amounts(reloaded) == [99.0]
+    assert reloaded.duplicate_ids == []
+    reloaded.close()
+
+
+def test_update_record_names_the_old_month(path):
+    data = open_data(path)
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    data.update_transaction(data.transactions[0].id, date=datetime(2020, 5, 1))
+    data.close()
+    with open(path + ".journal", encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert records[-1]['op'] == 'update'
+    assert records[-1]['transaction']['date'].startswith("2020-05")
+
+
+def test_partitioned_save_after_edit(tmp_path):
+    path = str(tmp_path / "data.json")
+    data = open_data(path, snapshot_format="partitioned")
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    data.update_transaction(data.transactions[0].id, amount=7)
+    data.save_data()
+    data.add_transaction(1, "tea", TransactionType.EXPENSE, "Food & Dining")
+    data.close()
+
+    reloaded = open_data(path, snapshot_format="partitioned")
+    assert amounts(reloaded) == [1.0, 7.0]
+    assert reloaded.check_consistency()
+    reloaded.close()
+
+
+def test_mapped_history_edit_survives_a_lost_journal_reset(tmp_path):
+    path = str(tmp_path / "history.fdb")
+    data = FinanceData(path, storage_mode="mapped", codec="binary")
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining")
+    data.close()
+    journal = open(path + ".journal", encoding='utf-8').read()
+    data = FinanceData(path, storage_mode="mapped", codec="binary")
+    data.compact()
+    data.close()
+    # As if the process died after writing the history but before resetting the journal
+    with open(path + ".journal", 'w', encoding='utf-8') as f:
+        f.write(journal)
+
+    reloaded = FinanceData(path, storage_mode="mapped", codec="binary")
+    assert amounts(reloaded) == [10.0]
+    assert reloaded.get_balance() == -10
+    reloaded.close()
+
+
+@pytest.mark.parametrize("fail", ["write", "replace"])
+def test_failed_compaction_keeps_the_mapped_history(tmp_path, monkeypatch, capsys, fail):
+    path = str(tmp_path / "history.fdb")
+    data = FinanceData(path, storage_mode="mapped", codec="binary")
+    data.add_transactions([dict(amount=i + 1, description=f"b{i}", transaction_type=TransactionType.EXPENSE,
+                                category="Food & Dining", date=datetime(2024, 1, i + 1)) for i in range(5)])
+    data.compact()
+    data.add_transaction(10, "lunch", TransactionType.EXPENSE, "Food & Dining", datetime(2024, 2, 1))
+    data.delete_transaction(next(t.id for t in data.transactions if t.amount == 1))
+    before = amounts(data), data.get_balance()
+    stored = open(path, 'rb').read()
+
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+    if fail == "write":
+        monkeypatch.setattr(BinaryCodec, "dump_columns", broken)
+    else:
+        monkeypatch.setattr(os, "replace", broken)
+    data.save_data()
+    assert "disk full" in capsys.readouterr().out
+    monkeypatch.undo()
+
+    assert (amounts(data), data.get_balance()) == before
+    assert open(path, 'rb').read() == stored
+    assert not os.path.exists(path + ".tmp")
+    data.save_data()
+    data.close()
+    reloaded = FinanceData(path, storage_mode="mapped", codec="binary")
+    assert (amounts(reloaded), reloaded.get_balance()) == before
+    reloaded.close()
@@ -0,0 +1,160 @@
+"""Partitioned snapshots read lazily, recent months first"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import FinanceData, JsonCodec, TransactionType
+
+
+@pytest.fixture
+def path(path, item):
+    """A partitioned file with a row in each of the last twelve months"""
+    data = FinanceData(path, snapshot_format="partitioned")
+    now = datetime.now()
+    data.add_transactions([item(i + 1, f"month {i}", date=now - timedelta(days=31 * i)) for i in range(12)])
+    data.close()
+    return path
+
+
+def open_recent(path):
+    return FinanceData(path, snapshot_format="partitioned", preload_days=30)
+
+
+def test_startup_reads_recent_months_only(path):
+    data = open_recent(path)
+    try:
+        assert len(data.transactions) < 12
+        assert data.has_older()
+        assert data.get_balance() == pytest.approx(-sum(range(1, 13)))
+    finally:
+        data.close()
+
+
+def oldest(path):
+    data = FinanceData(path, snapshot_format="partitioned")
+    transaction = min(data.transactions, key=lambda t: t.date)
+    data.close()
+    return transaction
+
+
+def test_lookup_reads_the_partition_holding_the_id(path):
+    transaction = oldest(path)
+    data = open_recent(path)
+    try:
+        assert data.get_transaction(transaction.id).description == transaction.description
+    finally:
+        data.close()
+
+
+def test_lookup_with_a_date_reads_only_that_month(path):
+    transaction = oldest(path)
+    data = open_recent(path)
+    try:
+        unloaded = len(data._unloaded)
+        assert data.get_transaction(transaction.id, when=transaction.date) is not None
+        assert len(data._unloaded) == unloaded - 1
+        # A wrong month is trusted, so an unknown id does not read every partition
+        assert data.get_transaction("missing", when=transaction.date) is None
+        data.delete_transaction("missing", when=transaction.date)
+        assert len(data._unloaded) == unloaded - 1
+    finally:
+        data.close()
+
+
+def test_update_and_delete_of_unloaded_rows(path):
+    transaction = oldest(path)
+    data = open_recent(path)
+    assert data.update_transaction(transaction.id, amount=50)
+    assert data.get_transaction(transaction.id).amount == 50
+    assert data.delete_transaction(transaction.id)
+    assert data.get_transaction(transaction.id) is None
+    balance = data.get_balance()
+    data.close()
+
+    reloaded = open_recent(path)
+    try:
+        assert reloaded.get_balance() == pytest.approx(balance)
+    finally:
+        reloaded.close()
+
+
+def open_journal(path):
+    return FinanceData(path, storage_mode="journal", snapshot_format="partitioned", preload_days=30)
+
+
+def test_journaled_in_month_edit_of_an_unloaded_row_survives_reopening(tmp_path):
+    path = str(tmp_path / "data.json")
+    data = open_journal(path)
+    now = datetime.now()
+    data.add_transaction(10, "old", TransactionType.EXPENSE, "Food & Dining", now - timedelta(days=200))
+    data.add_transaction(5, "recent", TransactionType.EXPENSE, "Food & Dining", now)
+    data.save_data()
+    old = min(data.transactions, key=lambda t: t.date)
+    # The edit keeps the row in its month, so its record names that month twice
+    assert data.update_transaction(old.id, amount=20)
+    data.close()
+
+    data = open_journal(path)
+    assert not data.load_failed
+    data.add_transaction(1, "new", TransactionType.EXPENSE, "Food & Dining", now)
+    data.save_data()
+    data.close()
+
+    reloaded = open_journal(path)
+    try:
+        assert reloaded.get_balance() == pytest.approx(-26)
+        assert reloaded.get_transaction(old.id).amount == 20
+    finally:
+        reloaded.close()
+
+
+def test_failed_load_does_not_overwrite_the_partitions(path):
+    manifest = open(path, encoding='utf-8').read()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(manifest[:-10])
+    data = FinanceData(path, storage_mode="journal", snapshot_format="partitioned")
+    assert data.load_failed
+    data.add_transaction(1, "new", TransactionType.EXPENSE, "Food & Dining")
+    data.save_data()
+    data.close()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(manifest)
+    reloaded = open_recent(path)
+    try:
+        assert reloaded.get_balance() == pytest.approx(-sum(range(1, 13)))
+    finally:
+        reloaded.close()
+
+
+def test_id_reassigned_while_loading_older_months_is_stored(tmp_path):
+    path = str(tmp_path / "data.json")
+    data = open_journal(path)
+    now = datetime.now()
+    data.add_transaction(10, "older", TransactionType.EXPENSE, "Food & Dining", now - timedelta(days=400))
+    data.add_transaction(20, "old", TransactionType.EXPENSE, "Food & Dining", now - timedelta(days=200))
+    data.save_data()
+    data.close()
+    # Force the two month files to share an id
+    files = [entry['file'] for entry in json.load(open(path, encoding='utf-8'))['partitions'].values()]
+    shared = JsonCodec().load(open(tmp_path / files[0], encoding='utf-8'))[0][0].id
+    rows, _ = JsonCodec().load(open(tmp_path / files[1], encoding='utf-8'))
+    rows[0].id = shared
+    with open(tmp_path / files[1], 'w', encoding='utf-8') as f:
+        JsonCodec().dump(f, rows)
+
+    data = open_journal(path)
+    data.load_older(months=24)
+    older = next(t for t in data.transactions if t.description == "older")
+    assert data.delete_transaction(older.id)
+    assert data.get_balance() == pytest.approx(-20)
+    data.close()
+
+    reloaded = open_journal(path)
+    try:
+        assert reloaded.get_balance() == pytest.approx(-20)
+        reloaded.load_older(months=24)
+        assert [t.description for t in reloaded.transactions] == ["old"]
+    finally:
+        reloaded.close()
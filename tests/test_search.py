@@ -0,0 +1,97 @@
+"""Word index and text search over descriptions and categories"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import FinanceData, SearchIndex, SqliteFinanceData, Transaction, TransactionType
+
+
+def transaction(description, category="Food & Dining", transaction_type=TransactionType.EXPENSE):
+    return Transaction(10, description, transaction_type, category)
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation_and_emoji():
+    assert SearchIndex.tokenize("Café☕ STRASSE, naïve-2024 🍩donut") == ["café", "strasse", "naïve", "2024", "donut"]
+    assert SearchIndex.tokenize(" ,.! 🍩 ") == []
+
+
+def test_prefix_and_all_words_matching():
+    rows = [transaction("Coffee shop"), transaction("Coffee beans", "Shopping"),
+            transaction("Bus ticket", "Transportation")]
+    index = SearchIndex(rows)
+    ids = [t.id for t in rows]
+    assert index.search("cof") == {ids[0], ids[1]}
+    # Every word must match, in the description or the category
+    assert index.search("coffee shop") == {ids[0], ids[1]}
+    assert index.search("coffee SHOPPING") == {ids[1]}
+    assert index.search("bus coffee") == set()
+    assert index.search("xyz") == set()
+    assert index.search(" !? ") is None
+
+
+def test_broad_terms_are_checked_through_lookup():
+    rows = [transaction(f"salary {i}") for i in range(40)] + [transaction("stripe payout")]
+    by_id = {t.id: t for t in rows}
+    index = SearchIndex(rows, by_id.get)
+    assert index.search("s payout") == {rows[-1].id}
+    # "3" is a prefix of 3 and of 30 to 39
+    assert index.search("sal 3") == {t.id for t in rows if t.description.startswith("salary 3")}
+
+
+def test_add_and_remove_keep_the_vocabulary_sorted():
+    index = SearchIndex()
+    first, second = transaction("zebra crossing"), transaction("apple pie")
+    index.add(first)
+    index.add_many([second])
+    assert index.words == sorted(index.words)
+    index.remove(first)
+    assert "zebra" not in index.words
+    assert index.search("zeb") == set()
+    index.remove_many([second])
+    assert (index.words, index.postings) == ([], {})
+
+
+@pytest.fixture(params=["journal", "sqlite"])
+def data(request, tmp_path):
+    if request.param == "sqlite":
+        finance = SqliteFinanceData(str(tmp_path / "data.db"))
+    else:
+        finance = FinanceData(str(tmp_path / "data.json"), storage_mode="journal")
+    yield finance
+    finance.close()
+
+
+def descriptions(data, text, **kwargs):
+    return [data.get_transaction(i).description for i in data.search(text, **kwargs)]
+
+
+def test_search_follows_adds_deletes_and_edits(data):
+    start = datetime(2024, 5, 1)
+    data.add_transaction(4, "Morning coffee", TransactionType.EXPENSE, "Food & Dining", start)
+    data.add_transaction(9, "Coffee grinder", TransactionType.EXPENSE, "Shopping", start + timedelta(days=1))
+    # The index is built on the first text query and kept up to date after that
+    assert descriptions(data, "coffee") == ["Coffee grinder", "Morning coffee"]
+
+    data.add_transaction(3, "Iced coffee", TransactionType.EXPENSE, "Food & Dining", start + timedelta(days=2))
+    assert descriptions(data, "coff") == ["Iced coffee", "Coffee grinder", "Morning coffee"]
+
+    grinder = data.search("grinder")[0]
+    assert data.update_transaction(grinder, description="Espresso grinder")
+    assert descriptions(data, "coffee") == ["Iced coffee", "Morning coffee"]
+    assert descriptions(data, "espresso shop") == ["Espresso grinder"]
+
+    morning = data.search("morning")[0]
+    assert data.delete_transaction(morning)
+    assert descriptions(data, "coffee") == ["Iced coffee"]
+    assert data.search("morning") == []
+
+
+def test_search_combines_words_with_filters(data):
+    start = datetime(2024, 5, 1)
+    data.add_transactions([dict(amount=i + 1, description=f"Lunch {i}", transaction_type=TransactionType.EXPENSE,
+                                category="Food & Dining", date=start + timedelta(days=i)) for i in range(10)])
+    assert descriptions(data, "lunch", min_amount=9) == ["Lunch 9", "Lunch 8"]
+    assert descriptions(data, "lunch", start=start + timedelta(days=2), end=start + timedelta(days=3)) == [
+        "Lunch 3", "Lunch 2"]
+    assert descriptions(data, "lunch", offset=8, limit=5) == ["Lunch 1", "Lunch 0"]
+    assert data.search("lunch", transaction_type=TransactionType.INCOME) == []
@@ -0,0 +1,49 @@
+"""SqliteFinanceData against the FinanceData API"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from finance_core import FinanceData, SqliteFinanceData
+
+
+@pytest.fixture
+def data(tmp_path):
+    finance = SqliteFinanceData(str(tmp_path / "data.db"))
+    yield finance
+    finance.close()
+
+
+def test_whole_history_is_listed(data, sample):
+    data.add_transactions(sample())
+    assert not data.has_older()
+    assert data.load_older() == 0
+    assert len(data.transactions) == 20
+
+
+def test_check_consistency(data, sample):
+    data.add_transactions(sample())
+    data.delete_transaction(data.transactions[0].id)
+    assert data.check_consistency()
+
+
+def test_stats_match_the_in_memory_backend(data, tmp_path, sample):
+    memory = FinanceData(str(tmp_path / "data.json"), storage_mode="journal")
+    try:
+        for backend in (data, memory):
+            backend.add_transactions(sample())
+        assert data.get_totals() == pytest.approx(memory.get_totals())
+        start = datetime(2024, 1, 5)
+        expected = memory.range_stats(start, start + timedelta(days=7))
+        actual = data.range_stats(start, start + timedelta(days=7))
+        assert (actual['income'], actual['expenses'], actual['count']) == \
+            pytest.approx((expected['income'], expected['expenses'], expected['count']))
+    finally:
+        memory.close()
+
+
+def test_has_every_attribute_finance_data_sets_up(data, tmp_path):
+    in_memory = FinanceData(str(tmp_path / "data.json"), storage_mode="journal")
+    try:
+        assert set(vars(in_memory)) <= set(vars(data))
+    finally:
+        in_memory.close()
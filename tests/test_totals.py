@@ -0,0 +1,134 @@
+"""Running income and expense totals kept by FinanceData"""
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from finance_core import FinanceData, TransactionType
+from finance_core.analytics import DailyTotals
+
+
+def test_totals_follow_adds_and_deletes(data, sample):
+    data.add_transactions(sample(30))
+    data.add_transaction(50, "bonus", TransactionType.INCOME, "Salary")
+    first = data.transactions[-1]
+    data.delete_transaction(first.id)
+    data.delete_transactions([t.id for t in data.transactions[:5]])
+
+    rows = data.transactions
+    income = sum(t.amount for t in rows if t.transaction_type == TransactionType.INCOME)
+    expenses = sum(t.amount for t in rows if t.transaction_type == TransactionType.EXPENSE)
+    assert data.get_totals() == pytest.approx({'income': income, 'expenses': expenses,
+                                               'balance': income - expenses})
+    assert data.get_balance() == pytest.approx(income - expenses)
+    assert data.check_consistency()
+
+
+def test_totals_are_rebuilt_on_load(data, path, sample):
+    data.add_transactions(sample(30))
+    balance = data.get_balance()
+    data.close()
+
+    reloaded = FinanceData(path, storage_mode="journal")
+    try:
+        assert reloaded.get_balance() == pytest.approx(balance)
+        assert reloaded.check_consistency()
+    finally:
+        reloaded.close()
+
+
+def test_check_consistency_notices_drift(data, sample):
+    data.add_transactions(sample(30))
+    data._income_total += 1
+    assert not data.check_consistency()
+
+
+def scan(data, start, end):
+    """range_stats worked out by checking every row"""
+    stats = {'income': 0.0, 'expenses': 0.0, 'count': 0, 'income_count': 0, 'expense_count': 0,
+             'categories': {TransactionType.INCOME: {}, TransactionType.EXPENSE: {}}}
+    for t in data.transactions:
+        if start is not None and t.date < (start if isinstance(start, datetime) else datetime.combine(start, time())):
+            continue
+        if end is not None and (t.date > end if isinstance(end, datetime) else t.date.date() > end):
+            continue
+        income = t.transaction_type == TransactionType.INCOME
+        stats['income' if income else 'expenses'] += t.amount
+        stats['income_count' if income else 'expense_count'] += 1
+        stats['count'] += 1
+        categories = stats['categories'][t.transaction_type]
+        categories[t.category] = categories.get(t.category, 0) + t.amount
+    stats['balance'] = stats['income'] - stats['expenses']
+    return stats
+
+
+def check_ranges(data):
+    day = datetime(2024, 1, 10)
+    bounds = [None, day.date(), day, day + timedelta(hours=9), day + timedelta(hours=9, microseconds=1),
+              day + timedelta(days=1), day + timedelta(days=1, hours=23, minutes=59), date(2024, 1, 12),
+              datetime(2024, 1, 15, 18), date(2023, 12, 1), date(2024, 3, 1)]
+    for start in bounds:
+        for end in bounds:
+            stats, expected = data.range_stats(start, end), scan(data, start, end)
+            for transaction_type, categories in expected.pop('categories').items():
+                assert stats['categories'][transaction_type] == pytest.approx(categories), (start, end)
+            assert {key: stats[key] for key in expected} == pytest.approx(expected), (start, end)
+
+
+def add_day_sample(data, sample):
+    # Several rows a day, at midnight and later, so ranges can start and end inside a day's bucket
+    items = sample(40)
+    for i, item in enumerate(items):
+        item['date'] = datetime(2024, 1, 5) + timedelta(hours=9 * i)
+    data.add_transactions(items)
+
+
+def test_range_stats_match_a_full_scan(data, sample):
+    add_day_sample(data, sample)
+    check_ranges(data)
+
+
+def test_range_stats_match_a_full_scan_after_adds_and_deletes(data, sample):
+    add_day_sample(data, sample)
+    day = datetime(2024, 1, 10)
+    # A new day before every bucket, one in the middle, and a row on the edge of an existing day
+    data.add_transaction(5, "early", TransactionType.EXPENSE, "Shopping", datetime(2024, 1, 1, 12))
+    data.add_transaction(7, "gap", TransactionType.INCOME, "Salary", datetime(2024, 1, 12, 23, 59))
+    data.add_transaction(3, "edge", TransactionType.EXPENSE, "Food & Dining", day)
+    check_ranges(data)
+
+    # Emptying the buckets of a whole day, and deleting a row from the middle of another
+    data.delete_transactions([t.id for t in data.transactions if t.date.date() == day.date()])
+    data.delete_transaction(next(t.id for t in data.transactions if t.date.date() == date(2024, 1, 12)))
+    data.update_transaction(data.transactions[0].id, amount=99, date=datetime(2024, 1, 11, 9))
+    check_ranges(data)
+
+
+def test_daily_totals_query_matches_a_full_scan():
+    rng = random.Random(5)
+    totals, buckets = DailyTotals(), {}
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(20)]
+    for step in range(200):
+        day = rng.choice(days)
+        if buckets.get(day, [0, 0])[1] and rng.random() < 0.3:
+            # Take one row back out, sometimes emptying the bucket
+            amount = buckets[day][0] / buckets[day][1]
+            totals.add(day, -amount, -1)
+            buckets[day] = [buckets[day][0] - amount, buckets[day][1] - 1]
+        elif step % 10 == 0:
+            batch = {d: [rng.randint(1, 50), 2] for d in rng.sample(days, 3)}
+            totals.add_many(batch)
+            for d, (amount, count) in batch.items():
+                buckets[d] = [buckets.get(d, [0, 0])[0] + amount, buckets.get(d, [0, 0])[1] + count]
+        else:
+            amount = rng.randint(1, 50)
+            totals.add(day, amount)
+            buckets[day] = [buckets.get(day, [0, 0])[0] + amount, buckets.get(day, [0, 0])[1] + 1]
+    assert totals.days == sorted(d for d, (_, count) in buckets.items() if count)
+
+    for first in [None] + days:
+        for last in [None] + days:
+            rows = [(amount, count) for d, (amount, count) in buckets.items()
+                    if (first is None or d >= first) and (last is None or d <= last)]
+            expected = (sum(a for a, _ in rows), sum(c for _, c in rows))
+            assert totals.query(first, last) == pytest.approx(expected), (first, last)